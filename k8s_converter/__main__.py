@@ -1,13 +1,13 @@
 #!/usr/bin/env python3
 
 import sys
-import os
 import argparse
 
-# Add the project root to the Python path
-sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
-
-from k8s_converter.cli.args import add_common_cli_args
+from k8s_converter.cli.args import (
+    add_common_cli_args,
+    non_negative_int,
+    positive_int,
+)
 from k8s_converter.cli.bulk_converter import run_cli
 
 
@@ -23,6 +23,19 @@ def add_api_parser(subparsers: argparse._SubParsersAction) -> None:
     api_parser.add_argument(
         "--reload", help="Enable auto-reload for development", action="store_true"
     )
+    api_parser.add_argument(
+        "--workers",
+        help="Number of worker processes (default: CPU count)",
+        type=positive_int,
+        default=None,
+    )
+    api_parser.add_argument(
+        "--parse-cache",
+        help="Cache up to N parsed manifests per worker so repeated uploads are "
+        "parsed once (default: 0, disabled)",
+        type=non_negative_int,
+        default=0,
+    )
 
 
 def add_cli_parser(subparsers: argparse._SubParsersAction) -> None:
@@ -50,7 +63,13 @@ def main():
     if args.command == "api":
         from k8s_converter.api.app import start_server
 
-        start_server(host=args.host, port=args.port, reload=args.reload)
+        start_server(
+            host=args.host,
+            port=args.port,
+            reload=args.reload,
+            workers=args.workers,
+            parse_cache=args.parse_cache,
+        )
     elif args.command == "cli":
         sys.exit(run_cli(args))
     else:
@@ -1,15 +1,113 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Body
-from typing import List
-from k8s_converter.core.converter import parse_k8s_yaml, K8sParserError
-from k8s_converter.api.schemas import ConversionResponse, BatchConversionResponse
-from k8s_converter.core.logger import logger
+import asyncio
+import codecs
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Body
+from typing import Any, Dict, List, Optional, Tuple
+from k8s_converter.core.converter import (
+    configure_parse_cache,
+    parse_k8s_yaml,
+    parse_k8s_yaml_stream,
+    K8sParserError,
+)
+from k8s_converter.api.schemas import (
+    BatchConversionResponse,
+    BatchFileResult,
+    ConversionResponse,
+)
+from k8s_converter.api.formparser import (
+    MultipartError,
+    MultipartTooLargeError,
+    iter_file_parts,
+)
+from k8s_converter.api.responses import ORJSONResponse
+from k8s_converter.core.logger import (
+    logger,
+    setup_queue_logging,
+    stop_queue_logging,
+)
+
+# The first files of a batch are parsed on threads; files beyond this many
+# go to a process pool, where parsing isn't serialized by the GIL. Smaller
+# batches aren't worth pickling the manifests to and from the workers.
+BATCH_POOL_THRESHOLD = 8
+
+_batch_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _batch_pool_size() -> int:
+    """
+    Return the number of batch worker processes for this server process.
+
+    start_server shares the CPUs between its server workers through
+    K8S_CONVERTER_BATCH_WORKERS; without it, all CPUs are used.
+    """
+    value = os.environ.get("K8S_CONVERTER_BATCH_WORKERS")
+    if value is not None:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            logger.warning("Ignoring invalid K8S_CONVERTER_BATCH_WORKERS: %r", value)
+    return os.cpu_count() or 1
+
+
+def _get_batch_pool() -> ProcessPoolExecutor:
+    """Return the process pool for large batches, starting it on first use"""
+    global _batch_pool
+    if _batch_pool is None:
+        # spawn rather than fork: forked workers would inherit the logging
+        # queue without the listener thread that drains it
+        _batch_pool = ProcessPoolExecutor(
+            max_workers=_batch_pool_size(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _batch_pool
+
+
+def _shutdown_batch_pool(
+    pool: Optional[ProcessPoolExecutor] = None, wait: bool = True
+) -> None:
+    """
+    Stop the batch process pool, if it was started.
+
+    Args:
+        pool (Optional[ProcessPoolExecutor]): Only stop the pool if it is still
+            this one; another request may already have replaced a broken pool
+        wait (bool): Whether to wait for the worker processes to exit
+    """
+    global _batch_pool
+    if _batch_pool is None or (pool is not None and _batch_pool is not pool):
+        return
+    _batch_pool.shutdown(wait=wait, cancel_futures=True)
+    _batch_pool = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Move logging off the event loop while the server runs, and release the
+    batch process pool when it shuts down
+    """
+    # Only the running server reroutes logging; importing the app doesn't
+    setup_queue_logging()
+    try:
+        yield
+    finally:
+        _shutdown_batch_pool()
+        stop_queue_logging()
 
-import uvicorn
 
 app = FastAPI(
     title="Kubernetes YAML to JSON Converter API",
     description="API for converting Kubernetes YAML manifests to JSON",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 
@@ -34,33 +132,65 @@ async def root():
     }
 
 
-@app.post("/convert/raw", response_model=ConversionResponse)
-async def convert_raw_yaml(yaml_content: str = Body(..., media_type="text/plain")):
+# The parsed manifest has already been schema-validated, so the response is
+# rendered directly instead of being re-validated through ConversionResponse
+@app.post("/convert/raw", responses={200: {"model": ConversionResponse}})
+async def convert_raw_yaml(yaml_content: bytes = Body(..., media_type="text/plain")):
     """
     Convert raw YAML text to JSON. This endpoint accepts plain text YAML content
     without requiring JSON encoding, making it easier to send multi-line YAML.
 
     Args:
-        yaml_content (str): Raw YAML content as plain text
+        yaml_content (bytes): Raw YAML content as plain text, handed to the
+            parser undecoded
 
     Returns:
-        ConversionResponse: JSON content and status message
+        ORJSONResponse: JSON content and status message
     """
     try:
         k8s_dict = parse_k8s_yaml(yaml_content)
 
-        return ConversionResponse(
-            json_content=k8s_dict, message="YAML converted successfully"
+        return ORJSONResponse(
+            {"json_content": k8s_dict, "message": "YAML converted successfully"}
         )
     except K8sParserError as e:
-        logger.error(f"YAML parsing error: {str(e)}")
+        logger.error("YAML parsing error: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.post("/convert/file", response_model=ConversionResponse)
+# Leading bytes of an upload that are checked for binary content before the
+# upload is handed to the parser
+_SNIFF_SIZE = 512
+_Utf8Decoder = codecs.getincrementaldecoder("utf-8")
+
+
+def _looks_like_text(head: bytes) -> bool:
+    """
+    Check whether the start of an upload can be a UTF-8 YAML document
+
+    Args:
+        head (bytes): Leading bytes of the upload
+
+    Returns:
+        bool: False if the bytes contain NUL or are not valid UTF-8
+    """
+    # libyaml decodes UTF-16 itself, NUL bytes included
+    if head[:2] in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
+        return True
+    if b"\x00" in head:
+        return False
+    try:
+        # Not final, so a character cut off at the end of head is accepted
+        _Utf8Decoder().decode(head)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+@app.post("/convert/file", responses={200: {"model": ConversionResponse}})
 async def convert_yaml_file(file: UploadFile = File(...)):
     """
     Convert uploaded YAML file to JSON
@@ -69,104 +199,169 @@ async def convert_yaml_file(file: UploadFile = File(...)):
         file (UploadFile): YAML file to convert
 
     Returns:
-        ConversionResponse: JSON content and status message
+        ORJSONResponse: JSON content and status message
     """
-    try:
-        # Read file content
-        content = await file.read()
-        yaml_content = content.decode("utf-8")
+    # Turn away binary uploads without running the parser over them
+    head = await file.read(_SNIFF_SIZE)
+    if not _looks_like_text(head):
+        logger.error("File encoding error in file %s", file.filename)
+        raise HTTPException(
+            status_code=400, detail="File encoding error: file must be UTF-8 encoded"
+        )
+    await file.seek(0)
 
-        # Parse YAML content
-        k8s_dict = parse_k8s_yaml(yaml_content)
+    try:
+        # Large uploads are parsed from a mapping of the spooled file rather
+        # than read into memory first
+        k8s_dict = await asyncio.to_thread(parse_k8s_yaml_stream, file.file)
 
         # Return JSON response
-        return ConversionResponse(
-            json_content=k8s_dict,
-            message=f"File '{file.filename}' converted successfully",
+        return ORJSONResponse(
+            {
+                "json_content": k8s_dict,
+                "message": f"File '{file.filename}' converted successfully",
+            }
         )
     except K8sParserError as e:
-        logger.error(f"YAML parsing error: {str(e)}")
+        logger.error("YAML parsing error: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
-    except UnicodeDecodeError:
-        logger.error("File encoding error")
-        raise HTTPException(
-            status_code=400, detail="File encoding error: file must be UTF-8 encoded"
-        )
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.post("/convert/batch", response_model=BatchConversionResponse)
-async def convert_yaml_batch(files: List[UploadFile] = File(...)):
+# The endpoint parses the multipart body itself, so the request body has to be
+# described for the OpenAPI docs by hand
+_BATCH_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["files"],
+                    "properties": {
+                        "files": {
+                            "type": "array",
+                            "items": {"type": "string", "format": "binary"},
+                        }
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@app.post(
+    "/convert/batch",
+    responses={200: {"model": BatchConversionResponse}},
+    openapi_extra=_BATCH_REQUEST_BODY,
+)
+async def convert_yaml_batch(request: Request):
     """
     Convert multiple uploaded YAML files to JSON
 
     Args:
-        files (List[UploadFile]): List of YAML files to convert
-        pretty (bool): Whether to format JSON with indentation
+        request (Request): multipart/form-data request with YAML files in the
+            "files" field
 
     Returns:
-        BatchConversionResponse: Results of batch conversion
+        ORJSONResponse: Results of batch conversion, shaped like BatchConversionResponse
     """
-    results = []
-    successful = 0
-    failed = 0
+    # Each file is parsed as soon as its part has been received, while the
+    # rest of the body is still streaming in
+    loop = asyncio.get_running_loop()
+    uploads: List[Tuple[Optional[str], "asyncio.Future[Dict[str, Any]]"]] = []
+    # Pool each upload was submitted to, if any
+    pools: List[Optional[ProcessPoolExecutor]] = []
+    try:
+        async for part in iter_file_parts(request, "files"):
+            if len(uploads) < BATCH_POOL_THRESHOLD:
+                pool = None
+                future = asyncio.create_task(
+                    asyncio.to_thread(parse_k8s_yaml, part.content)
+                )
+            else:
+                pool = _get_batch_pool()
+                future = loop.run_in_executor(pool, parse_k8s_yaml, part.content)
+            uploads.append((part.filename, future))
+            pools.append(pool)
+    except MultipartError as e:
+        for _, future in uploads:
+            future.cancel()
+        logger.error("Invalid batch upload: %s", e)
+        status_code = 413 if isinstance(e, MultipartTooLargeError) else 400
+        raise HTTPException(status_code=status_code, detail=str(e))
 
-    for file in files:
-        try:
-            content = await file.read()
-            yaml_content = content.decode("utf-8")
+    if not uploads:
+        raise HTTPException(status_code=422, detail="No files uploaded in 'files'")
+
+    outcomes = await asyncio.gather(
+        *(future for _, future in uploads), return_exceptions=True
+    )
 
-            k8s_dict = parse_k8s_yaml(yaml_content)
+    # A worker died; start a fresh pool for the next batch. Only the pool
+    # that broke is stopped, without blocking the event loop on its workers.
+    broken = {
+        pool
+        for pool, outcome in zip(pools, outcomes)
+        if isinstance(outcome, BrokenProcessPool)
+    }
+    for pool in broken:
+        _shutdown_batch_pool(pool, wait=False)
 
-            results.append(
-                {
-                    "filename": file.filename,
-                    "status": "success",
-                    "json_content": k8s_dict,
-                }
-            )
-            successful += 1
+    results: List[BatchFileResult] = []
+    successful = 0
+    failed = 0
 
-        except K8sParserError as e:
-            logger.error(f"YAML parsing error in file {file.filename}: {str(e)}")
+    for (filename, _), outcome in zip(uploads, outcomes):
+        if isinstance(outcome, K8sParserError):
+            logger.error("YAML parsing error in file %s: %s", filename, outcome)
             results.append(
-                {"filename": file.filename, "status": "error", "error": str(e)}
+                {"filename": filename, "status": "error", "error": str(outcome)}
             )
             failed += 1
 
-        except UnicodeDecodeError:
-            logger.error(f"File encoding error in file {file.filename}")
+        elif isinstance(outcome, BaseException):
+            logger.error("Unexpected error processing file %s: %s", filename, outcome)
             results.append(
                 {
-                    "filename": file.filename,
+                    "filename": filename,
                     "status": "error",
-                    "error": "File encoding error: file must be UTF-8 encoded",
+                    "error": f"Unexpected error: {str(outcome)}",
                 }
             )
             failed += 1
 
-        except Exception as e:
-            logger.error(f"Unexpected error processing file {file.filename}: {str(e)}")
+        else:
             results.append(
                 {
-                    "filename": file.filename,
-                    "status": "error",
-                    "error": f"Unexpected error: {str(e)}",
+                    "filename": filename,
+                    "status": "success",
+                    "json_content": outcome,
                 }
             )
-            failed += 1
+            successful += 1
 
-    return BatchConversionResponse(
-        results=results,
-        successful=successful,
-        failed=failed,
-        message=f"Processed {len(files)} files: {successful} successful, {failed} failed",
+    return ORJSONResponse(
+        {
+            "results": results,
+            "successful": successful,
+            "failed": failed,
+            "message": f"Processed {len(uploads)} files: {successful} successful, {failed} failed",
+        }
     )
 
 
-def start_server(host: str = "0.0.0.0", port: int = 8000, reload: bool = False):
+def start_server(
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    reload: bool = False,
+    workers: Optional[int] = None,
+    parse_cache: int = 0,
+    batch_workers: Optional[int] = None,
+):
     """
     Start the FastAPI server
 
@@ -174,8 +369,52 @@ def start_server(host: str = "0.0.0.0", port: int = 8000, reload: bool = False):
         host (str): Host to bind to
         port (int): Port to bind to
         reload (bool): Whether to enable auto-reload
+        workers (Optional[int]): Number of worker processes (default: CPU count,
+            always 1 when reload is enabled)
+        parse_cache (int): Number of parsed manifests each worker caches
+            (default: 0, disabled)
+        batch_workers (Optional[int]): Number of batch parsing processes each
+            worker starts (default: the CPU count divided by workers)
+
+    Raises:
+        ValueError: If workers or batch_workers is less than 1
     """
-    uvicorn.run("k8s_converter.api.app:app", host=host, port=port, reload=reload)
+    # Only needed to launch the server; importing the app alone (tests, other
+    # ASGI servers) does not pay for it
+    import uvicorn
+
+    # Reload needs a single parent process to restart
+    if reload:
+        workers = 1
+    elif workers is None:
+        workers = os.cpu_count() or 1
+    elif workers < 1:
+        raise ValueError(f"Number of workers must be at least 1: {workers}")
+
+    # Each server worker has its own batch pool; together they shouldn't
+    # start more parsing processes than there are CPUs
+    if batch_workers is None:
+        batch_workers = max(1, (os.cpu_count() or 1) // workers)
+    elif batch_workers < 1:
+        raise ValueError(f"Number of batch workers must be at least 1: {batch_workers}")
+    # Worker processes import the app afresh and read the size from here
+    os.environ["K8S_CONVERTER_BATCH_WORKERS"] = str(batch_workers)
+
+    if parse_cache:
+        configure_parse_cache(parse_cache)
+        # Worker processes import the app afresh and read the size from here
+        os.environ["K8S_CONVERTER_PARSE_CACHE"] = str(parse_cache)
+
+    uvicorn.run(
+        "k8s_converter.api.app:app",
+        host=host,
+        port=port,
+        reload=reload,
+        workers=workers,
+        # uvloop is not available on Windows
+        loop="uvloop" if sys.platform != "win32" else "asyncio",
+        http="httptools",
+    )
 
 
 if __name__ == "__main__":
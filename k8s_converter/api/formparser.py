@@ -0,0 +1,176 @@
+"""
+Streaming multipart parsing for batch uploads.
+
+Starlette's form parser spools every uploaded file into its own
+SpooledTemporaryFile before the endpoint runs. Kubernetes manifests are
+small, so this parser keeps each file part in memory and hands it to the
+caller as soon as the part has been received.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from starlette.requests import Request
+
+try:
+    import python_multipart as multipart
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # pragma: no cover
+    import multipart
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import parse_options_header
+
+# Limits matching Starlette's defaults for form parsing; parts are held in
+# memory, so their size, the size of all of them together and the size of
+# their headers are capped as well
+MAX_FILES = 1000
+MAX_PART_SIZE = 16 * 1024 * 1024
+MAX_TOTAL_SIZE = 64 * 1024 * 1024
+# Recent python-multipart releases cap header lines themselves; older ones
+# let a header grow without bound
+MAX_HEADER_SIZE = 8 * 1024
+
+
+class MultipartError(Exception):
+    """Raised when a request body is not valid multipart form data"""
+
+    pass
+
+
+class MultipartTooLargeError(MultipartError):
+    """Raised when the files of a request exceed a size limit"""
+
+    pass
+
+
+@dataclass
+class FilePart:
+    """A file part of a multipart request"""
+
+    filename: Optional[str]
+    content: bytes
+
+
+class _FilePartCollector:
+    """python-multipart callbacks collecting the file parts of one form field"""
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name.encode("utf-8")
+        self.completed: Deque[FilePart] = deque()
+        self.files = 0
+        self.total_size = 0
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._filename: Optional[str] = None
+        self._data: Optional[bytearray] = None
+
+    def callbacks(self) -> Dict[str, object]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+        self._filename = None
+        self._data = None
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name = self._append_header(self._header_name, data, start, end)
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value = self._append_header(self._header_value, data, start, end)
+
+    @staticmethod
+    def _append_header(header: bytes, data: bytes, start: int, end: int) -> bytes:
+        if len(header) + end - start > MAX_HEADER_SIZE:
+            raise MultipartError(
+                f"Part header exceeds the maximum size of {MAX_HEADER_SIZE} bytes"
+            )
+        return header + data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        # Other form fields, and plain values in this field, are skipped
+        if options.get(b"name") != self.field_name or b"filename" not in options:
+            return
+
+        self.files += 1
+        if self.files > MAX_FILES:
+            raise MultipartError(
+                f"Too many files. Maximum number of files is {MAX_FILES}"
+            )
+        self._filename = options[b"filename"].decode("utf-8", errors="replace")
+        self._data = bytearray()
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._data is None:
+            return
+        size = end - start
+        if len(self._data) + size > MAX_PART_SIZE:
+            raise MultipartTooLargeError(
+                f"File '{self._filename}' exceeds the maximum size of "
+                f"{MAX_PART_SIZE // (1024 * 1024)}MB"
+            )
+        # Every part is kept until the whole batch has been converted
+        self.total_size += size
+        if self.total_size > MAX_TOTAL_SIZE:
+            raise MultipartTooLargeError(
+                "Uploaded files exceed the maximum total size of "
+                f"{MAX_TOTAL_SIZE // (1024 * 1024)}MB"
+            )
+        self._data += memoryview(data)[start:end]
+
+    def on_part_end(self) -> None:
+        if self._data is not None:
+            self.completed.append(FilePart(self._filename, bytes(self._data)))
+            self._data = None
+
+
+async def iter_file_parts(request: Request, field_name: str) -> AsyncIterator[FilePart]:
+    """
+    Parse a multipart/form-data request body as it streams in.
+
+    Args:
+        request (Request): Incoming request
+        field_name (str): Form field whose file parts are returned
+
+    Yields:
+        FilePart: Each file uploaded in the field, as soon as it is complete
+
+    Raises:
+        MultipartError: If the body is not valid multipart form data
+        MultipartTooLargeError: If a file, or all files together, are too large
+    """
+    media_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if media_type != b"multipart/form-data" or b"boundary" not in params:
+        raise MultipartError("Expected a multipart/form-data request with a boundary")
+
+    collector = _FilePartCollector(field_name)
+    parser = multipart.MultipartParser(params[b"boundary"], collector.callbacks())
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            while collector.completed:
+                yield collector.completed.popleft()
+        parser.finalize()
+    except FormParserError as e:
+        raise MultipartError(f"Invalid multipart data: {str(e)}") from e
+
+    while collector.completed:
+        yield collector.completed.popleft()
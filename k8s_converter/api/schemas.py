@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, List, TypedDict
 
 
 class YamlRequest(BaseModel):
@@ -16,3 +16,12 @@ class BatchConversionResponse(BaseModel):
     successful: int
     failed: int
     message: str = "Batch conversion completed"
+
+
+class BatchFileResult(TypedDict, total=False):
+    """Per-file entry of BatchConversionResponse.results"""
+
+    filename: str
+    status: str
+    json_content: Dict[str, Any]
+    error: str
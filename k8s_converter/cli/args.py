@@ -6,6 +6,50 @@ This module centralizes CLI argument definitions to avoid duplication.
 import argparse
 
 
+def non_negative_int(value: str) -> int:
+    """
+    Argument type for counts that may be zero.
+
+    Args:
+        value (str): Command-line value
+
+    Returns:
+        int: The parsed value
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not an integer of at least 0
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be a non-negative integer: {value!r}")
+    return number
+
+
+def positive_int(value: str) -> int:
+    """
+    Argument type for counts of at least one.
+
+    Args:
+        value (str): Command-line value
+
+    Returns:
+        int: The parsed value
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not an integer of at least 1
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value!r}")
+    return number
+
+
 def add_common_cli_args(parser: argparse.ArgumentParser) -> None:
     """
     Add common CLI arguments to a parser.
@@ -28,6 +72,28 @@ def add_common_cli_args(parser: argparse.ArgumentParser) -> None:
         help="Recursively process subdirectories",
         action="store_true",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="Number of worker processes for directory input (default: CPU count)",
+        type=positive_int,
+        default=None,
+    )
+    parser.add_argument(
+        "--parse-cache",
+        help="Cache up to N parsed manifests so identical files are parsed once "
+        "(default: 0, disabled)",
+        type=non_negative_int,
+        default=0,
+        metavar="N",
+    )
+    parser.add_argument(
+        "--bundle",
+        help="Write the JSON files of a directory into a single zip archive at "
+        "FILE instead of the output directory",
+        default=None,
+        metavar="FILE",
+    )
     parser.add_argument(
         "--no-pretty",
         help="Output minified JSON without indentation",
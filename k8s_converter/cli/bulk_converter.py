@@ -1,16 +1,30 @@
+import itertools
 import logging
+import multiprocessing
+import os
 import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Iterator, List, Optional
 
 from k8s_converter.core.converter import (
-    yaml_file_to_json,
-    save_json_to_file,
+    configure_parse_cache,
+    get_parse_cache_size,
+    yaml_file_to_json_all,
+    serialize_json,
+    write_json_file,
     K8sParserError,
 )
 
-from k8s_converter.core.logger import logger
+from k8s_converter.core.logger import logger, skip_unused_record_fields
 from k8s_converter.cli.args import create_cli_parser
 
+# Directories with fewer files than this are converted serially, since
+# starting a process pool would cost more than it saves
+PARALLEL_THRESHOLD = 8
+
 
 def process_file(input_file: Path, output_dir: Path, pretty: bool = True) -> bool:
     """
@@ -24,25 +38,168 @@ def process_file(input_file: Path, output_dir: Path, pretty: bool = True) -> boo
     Returns:
         bool: True if successful, False otherwise
     """
+    return _write_result(_convert_file_task((input_file, output_dir, pretty)))
+
+
+def _convert_file_task(
+    task: tuple[Path, Path, bool],
+) -> tuple[Path, Optional[List[tuple[Path, bytes]]]]:
+    """
+    Convert an (input_file, output_dir, pretty) task to serialized JSON.
+
+    A file holding a single manifest is converted to <stem>.json; one holding
+    several '---' separated manifests to <stem>.0.json, <stem>.1.json, ...
+    Runs in worker processes, so the outputs are returned rather than written.
+
+    Args:
+        task (tuple[Path, Path, bool]): (input_file, output_dir, pretty)
+
+    Returns:
+        tuple[Path, Optional[List[tuple[Path, bytes]]]]: (input_file, outputs),
+            where outputs pairs each output file with its payload and is None
+            if the conversion failed
+    """
+    input_file, output_dir, pretty = task
+    try:
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Processing %s", input_file)
+        manifests = yaml_file_to_json_all(input_file)
+
+        if len(manifests) == 1:
+            names = [f"{input_file.stem}.json"]
+        else:
+            names = [f"{input_file.stem}.{i}.json" for i in range(len(manifests))]
+        return input_file, [
+            (output_dir / name, serialize_json(manifest, pretty))
+            for name, manifest in zip(names, manifests)
+        ]
+    except K8sParserError as e:
+        logger.error("Failed to convert %s: %s", input_file, e)
+    except Exception as e:
+        logger.error("Unexpected error processing %s: %s", input_file, e)
+    return input_file, None
+
+
+def _in_bundle(bundle: zipfile.ZipFile, name: str) -> bool:
+    """Check whether the archive already has a member with the given name"""
     try:
-        output_file = output_dir / f"{input_file.stem}.json"
+        bundle.getinfo(name)
+    except KeyError:
+        return False
+    return True
+
+
+def _write_result(
+    result: tuple[Path, Optional[List[tuple[Path, bytes]]]],
+    bundle: Optional[zipfile.ZipFile] = None,
+) -> bool:
+    """
+    Write the output of _convert_file_task to disk.
+
+    Args:
+        result (tuple[Path, Optional[List[tuple[Path, bytes]]]]): (input_file, outputs)
+        bundle (Optional[zipfile.ZipFile]): Archive to add the outputs to, as
+            members named by their output paths, instead of writing files
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    input_file, outputs = result
+    if outputs is None:
+        return False
 
-        logger.info(f"Processing {input_file}")
-        json_data = yaml_file_to_json(input_file)
+    if bundle is not None:
+        # Different inputs can map to the same output, such as a.yaml and a.yml
+        for output_file, _ in outputs:
+            if _in_bundle(bundle, output_file.as_posix()):
+                logger.error(
+                    "Failed to convert %s: %s is already in the bundle",
+                    input_file,
+                    output_file,
+                )
+                return False
 
-        save_json_to_file(json_data, output_file, pretty)
-        logger.info(f"Successfully converted {input_file} to {output_file}")
-        return True
+    try:
+        for output_file, payload in outputs:
+            if bundle is None:
+                write_json_file(payload, output_file)
+            else:
+                bundle.writestr(output_file.as_posix(), payload)
     except K8sParserError as e:
-        logger.error(f"Failed to convert {input_file}: {str(e)}")
+        logger.error("Failed to convert %s: %s", input_file, e)
         return False
-    except Exception as e:
-        logger.error(f"Unexpected error processing {input_file}: {str(e)}")
+    except OSError as e:
+        logger.error("Failed to add %s to the bundle: %s", input_file, e)
         return False
 
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Successfully converted %s to %s",
+            input_file,
+            ", ".join(str(output_file) for output_file, _ in outputs),
+        )
+    return True
+
+
+def _iter_file_tasks(
+    input_dir: Path,
+    output_dir: Path,
+    pretty: bool,
+    recursive: bool,
+    make_dirs: bool = True,
+) -> Iterator[tuple[Path, Path, bool]]:
+    """
+    Walk a directory with os.scandir and yield process_file task tuples.
+
+    Args:
+        input_dir (Path): Directory containing input YAML files
+        output_dir (Path): Directory to save the output JSON files
+        pretty (bool): Whether to format JSON with indentation
+        recursive (bool): Whether to recursively walk subdirectories
+        make_dirs (bool): Whether to create the output subdirectories
+
+    Yields:
+        tuple[Path, Path, bool]: (input_file, output_dir, pretty) for each YAML file
+    """
+    # Each entry pairs a directory to scan with its output directory, so
+    # the relative path never has to be recomputed per file
+    stack = [(os.fspath(input_dir), output_dir)]
+    while stack:
+        scan_dir, file_output_dir = stack.pop()
+        created = not make_dirs or file_output_dir == output_dir
+        with os.scandir(scan_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append((entry.path, file_output_dir / entry.name))
+                elif entry.name.endswith((".yaml", ".yml")):
+                    # For recursive processing, maintain directory structure
+                    if not created:
+                        file_output_dir.mkdir(parents=True, exist_ok=True)
+                        created = True
+                    yield Path(entry.path), file_output_dir, pretty
+
+
+def _pool_context() -> multiprocessing.context.BaseContext:
+    """
+    Pick the multiprocessing start method for the conversion pool.
+
+    Forked workers share the already imported modules copy-on-write instead
+    of importing the package again in every worker. Windows only supports
+    spawn.
+    """
+    if sys.platform == "win32":
+        return multiprocessing.get_context("spawn")
+    return multiprocessing.get_context("fork")
+
 
 def process_directory(
-    input_dir: Path, output_dir: Path, pretty: bool = True, recursive: bool = False
+    input_dir: Path,
+    output_dir: Path,
+    pretty: bool = True,
+    recursive: bool = False,
+    jobs: Optional[int] = None,
+    bundle: Optional[Path] = None,
 ) -> tuple[int, int]:
     """
     Process all YAML files in a directory and convert them to JSON.
@@ -52,31 +209,59 @@ def process_directory(
         output_dir (Path): Directory to save the output JSON files
         pretty (bool): Whether to format JSON with indentation
         recursive (bool): Whether to recursively process subdirectories
+        jobs (Optional[int]): Number of worker processes (default: CPU count)
+        bundle (Optional[Path]): Zip archive to write the JSON files into, with
+            the same relative layout, instead of output_dir
 
     Returns:
         tuple[int, int]: (number of successful conversions, total number of files processed)
-    """
-    output_dir.mkdir(parents=True, exist_ok=True)
 
-    pattern = "**/*.y*ml" if recursive else "*.y*ml"
-    yaml_files = list(input_dir.glob(pattern))
+    Raises:
+        K8sParserError: If the bundle cannot be created
+    """
+    if bundle is None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        tasks = _iter_file_tasks(input_dir, output_dir, pretty, recursive)
+        archive = nullcontext()
+    else:
+        # Members are named relative to the root of the archive; the many
+        # small outputs go into one file, stored uncompressed
+        tasks = _iter_file_tasks(input_dir, Path(), pretty, recursive, make_dirs=False)
+        try:
+            bundle.parent.mkdir(parents=True, exist_ok=True)
+            archive = zipfile.ZipFile(bundle, "w", zipfile.ZIP_STORED)
+        except OSError as e:
+            raise K8sParserError(f"Cannot create bundle {bundle}: {str(e)}")
 
-    successful = 0
-    total = len(yaml_files)
+    # Only start a pool when there are enough files to make it worthwhile
+    head = list(itertools.islice(tasks, PARALLEL_THRESHOLD))
 
-    for yaml_file in yaml_files:
-        # For recursive processing, maintain directory structure
-        if recursive and yaml_file.parent != input_dir:
-            relative_path = yaml_file.parent.relative_to(input_dir)
-            file_output_dir = output_dir / relative_path
-            file_output_dir.mkdir(parents=True, exist_ok=True)
+    with archive as zf:
+        if jobs == 1 or len(head) < PARALLEL_THRESHOLD:
+            if zf is None:
+                results = [process_file(*task) for task in itertools.chain(head, tasks)]
+            else:
+                results = [
+                    _write_result(_convert_file_task(task), zf)
+                    for task in itertools.chain(head, tasks)
+                ]
         else:
-            file_output_dir = output_dir
-
-        if process_file(yaml_file, file_output_dir, pretty):
-            successful += 1
+            # Files discovered by the walk are submitted as they are found, and
+            # handed out in chunks to amortize IPC for small manifests. Workers
+            # only convert; the outputs are written here as they come back.
+            with ProcessPoolExecutor(
+                max_workers=os.cpu_count() if jobs is None else jobs,
+                mp_context=_pool_context(),
+                initializer=configure_parse_cache,
+                initargs=(get_parse_cache_size(),),
+            ) as executor:
+                converted = executor.map(
+                    _convert_file_task, itertools.chain(head, tasks), chunksize=4
+                )
+                results = [_write_result(result, zf) for result in converted]
 
-    return successful, total
+    total = len(results)
+    return sum(results), total
 
 
 def run_cli(args=None):
@@ -94,29 +279,43 @@ def run_cli(args=None):
         args = parser.parse_args()
 
     # Set logging level
+    skip_unused_record_fields()
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
+    if args.parse_cache:
+        configure_parse_cache(args.parse_cache)
+
     input_path = Path(args.input)
     output_path = Path(args.output)
     pretty = not args.no_pretty
 
     if not input_path.exists():
-        logger.error(f"Input path does not exist: {input_path}")
+        logger.error("Input path does not exist: %s", input_path)
         return 1
 
+    bundle = Path(args.bundle) if args.bundle else None
+
     # Process input
     if input_path.is_file():
+        if bundle is not None:
+            logger.error("--bundle requires a directory input")
+            return 1
+
         # Process a single file
         output_path.mkdir(parents=True, exist_ok=True)
         success = process_file(input_path, output_path, pretty)
         return 0 if success else 1
     else:
         # Process a directory
-        successful, total = process_directory(
-            input_path, output_path, pretty, args.recursive
-        )
-        logger.info(f"Processed {total} files, {successful} successful conversions")
+        try:
+            successful, total = process_directory(
+                input_path, output_path, pretty, args.recursive, args.jobs, bundle
+            )
+        except K8sParserError as e:
+            logger.error("%s", e)
+            return 1
+        logger.info("Processed %d files, %d successful conversions", total, successful)
         return 0 if successful == total else 1
 
 
@@ -1,14 +1,135 @@
+import hashlib
 import json
+import mmap
+import os
+import re
+import sys
+import threading
+import orjson
 import yaml
 import logging
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, Union
-from jsonschema import validate
-from yaml.parser import ParserError
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Callable,
+    Dict,
+    Any,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+from k8s_converter.core.logger import logger
+
+if TYPE_CHECKING:
+    from jsonschema import Draft202012Validator
+
+# Prefer the libyaml-backed loader; fall back to the pure-Python one when
+# PyYAML was built without libyaml.
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
+# Tags whose constructors Kubernetes manifests need; everything else
+# (!!binary, !!timestamp, !!set, !!omap, !!pairs) is rejected
+_K8S_TAGS = (
+    "tag:yaml.org,2002:null",
+    "tag:yaml.org,2002:bool",
+    "tag:yaml.org,2002:int",
+    "tag:yaml.org,2002:float",
+    "tag:yaml.org,2002:str",
+    "tag:yaml.org,2002:seq",
+    "tag:yaml.org,2002:map",
+)
+
+_INT_TAG = "tag:yaml.org,2002:int"
+_FLOAT_TAG = "tag:yaml.org,2002:float"
+_STR_TAG = "tag:yaml.org,2002:str"
+_DIGITS = frozenset("0123456789")
+_OCTAL_DIGITS = frozenset("01234567")
+_NUMBER_START = frozenset("+-0123456789")
+
+
+def _resolve_number(value: str) -> Optional[str]:
+    """
+    Resolve the common forms of plain numeric scalars in a single pass.
+
+    Handles decimal integers, octal integers and simple decimal floats, and
+    leaves everything else (hex, binary, underscores, exponents,
+    sexagesimal, .inf/.nan) to the regular expression resolvers.
+
+    Args:
+        value (str): Plain scalar starting with a sign or a digit
+
+    Returns:
+        Optional[str]: Resolved tag, or None if the value needs the full resolvers
+    """
+    length = len(value)
+    start = i = 1 if value[0] in "+-" else 0
+    while i < length and value[i] in _DIGITS:
+        i += 1
+    if i == start:
+        return None
+
+    if i == length:
+        # "0", "[1-9][0-9]*" and "0[0-7]+" are ints; "08" and the like
+        # match neither the int nor the float pattern
+        if value[start] != "0" or i - start == 1:
+            return _INT_TAG
+        return _INT_TAG if _OCTAL_DIGITS.issuperset(value[start + 1 :]) else _STR_TAG
+
+    if value[i] != ".":
+        return None
+    i += 1
+    while i < length and value[i] in _DIGITS:
+        i += 1
+    return _FLOAT_TAG if i == length else None
+
+
+class K8sLoader(_Loader):
+    """
+    Safe loader restricted to the JSON-compatible subset of YAML that
+    Kubernetes manifests use.
+
+    Plain scalars that look like timestamps stay strings, as they do when
+    Kubernetes itself converts a manifest to JSON.
+    """
+
+    yaml_constructors = {tag: _Loader.yaml_constructors[tag] for tag in _K8S_TAGS}
+    yaml_constructors[None] = _Loader.yaml_constructors[None]
+
+    yaml_implicit_resolvers = {
+        first: [
+            (tag, regexp)
+            for tag, regexp in resolvers
+            if tag != "tag:yaml.org,2002:timestamp"
+        ]
+        for first, resolvers in _Loader.yaml_implicit_resolvers.items()
+    }
+
+    def resolve(self, kind, value, implicit):
+        # Most numeric scalars are resolved without running the int and float
+        # regular expressions; the rest fall through to the usual resolvers
+        if kind is yaml.ScalarNode and implicit[0] and value[:1] in _NUMBER_START:
+            tag = _resolve_number(value)
+            if tag is not None:
+                return tag
+        return super().resolve(kind, value, implicit)
+
+    def construct_mapping(self, node, deep=False):
+        # The same few keys (name, image, labels, ...) repeat throughout a
+        # manifest; interned, every occurrence shares one str object and
+        # lookups with literal keys match on identity
+        mapping = super().construct_mapping(node, deep=deep)
+        return {
+            sys.intern(key) if type(key) is str else key: value
+            for key, value in mapping.items()
+        }
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
 
 # Basic Kubernetes resource schema for validation
 K8S_SCHEMA = {
@@ -21,6 +142,105 @@ K8S_SCHEMA = {
     },
 }
 
+# Built on first use: manifests that pass _is_valid_manifest never reach
+# jsonschema, which takes longer to import than the rest of this module
+_k8s_validator: Optional["Draft202012Validator"] = None
+
+
+def _get_validator() -> "Draft202012Validator":
+    """Return the K8S_SCHEMA validator, importing jsonschema on first use"""
+    global _k8s_validator
+    if _k8s_validator is None:
+        from jsonschema import Draft202012Validator
+
+        Draft202012Validator.check_schema(K8S_SCHEMA)
+        _k8s_validator = Draft202012Validator(K8S_SCHEMA)
+    return _k8s_validator
+
+
+def _is_valid_manifest(k8s_dict: Dict[str, Any]) -> bool:
+    """
+    Check a manifest against K8S_SCHEMA without going through jsonschema.
+
+    Valid manifests are the common case, so only those are decided here;
+    jsonschema still runs on anything this rejects, to report the error.
+    Must be kept in step with K8S_SCHEMA.
+
+    Args:
+        k8s_dict (Dict[str, Any]): Loaded document
+
+    Returns:
+        bool: True if the document conforms to K8S_SCHEMA
+    """
+    try:
+        api_version = k8s_dict["apiVersion"]
+        kind = k8s_dict["kind"]
+        metadata = k8s_dict["metadata"]
+    except KeyError:
+        return False
+    return (
+        isinstance(api_version, str)
+        and isinstance(kind, str)
+        and isinstance(metadata, dict)
+        and isinstance(metadata.get("name", ""), str)
+    )
+
+
+# Empty or whitespace-only documents; unlike str.isspace this works on mmaps
+_BLANK_RE = re.compile(r"\s*\Z")
+_BLANK_BYTES_RE = re.compile(rb"\s*\Z")
+
+# C0 control characters (other than tab, LF and CR) and DEL, which YAML
+# doesn't allow anywhere in a document
+_CONTROL_CHAR_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+_CONTROL_BYTE_RE = re.compile(b"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+# Every other byte value. Deleting these with bytes.translate leaves only the
+# control characters, in a single table-driven pass that is several times
+# faster than searching with the character class; the regexes then only run
+# to locate a control character that is known to be there.
+_NON_CONTROL_BYTES = bytes(
+    value for value in range(256) if not _CONTROL_BYTE_RE.match(bytes([value]))
+)
+# mmaps are scanned in slices of this size rather than copied whole
+_CONTROL_SCAN_CHUNK = 1024 * 1024
+_UTF16_BOMS = (b"\xff\xfe", b"\xfe\xff")
+
+# A '---' document marker at the start of a line, used to tell multi-document
+# streams apart from single manifests
+_DOC_MARKER_RE = re.compile("---")
+_DOC_MARKER_AT_RE = re.compile(r"(?<![^\n])---(?=[ \t\r\n]|\Z)")
+_DOC_MARKER_BYTES_RE = re.compile(b"---")
+_DOC_MARKER_BYTES_AT_RE = re.compile(rb"(?<![^\n])---(?=[ \t\r\n]|\Z)")
+
+# Number of leading characters inspected to detect JSON input
+_JSON_SNIFF_SIZE = 64
+
+# Files at least this large are read through mmap instead of read()
+MMAP_THRESHOLD = 64 * 1024
+
+# Parsed manifests can be cached by content digest so repeated uploads of
+# the same manifest skip parsing. The cache holds parsed manifests for the
+# life of the process, so it is off unless K8S_CONVERTER_PARSE_CACHE (or
+# configure_parse_cache) sets a size.
+_parse_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
+def _parse_cache_size_from_env() -> int:
+    """Read the parse cache size from K8S_CONVERTER_PARSE_CACHE (default: 0)"""
+    value = os.environ.get("K8S_CONVERTER_PARSE_CACHE", "0")
+    try:
+        size = int(value)
+    except ValueError:
+        size = -1
+    if size < 0:
+        logger.warning("Ignoring invalid K8S_CONVERTER_PARSE_CACHE: %r", value)
+        return 0
+    return size
+
+
+_parse_cache_size = _parse_cache_size_from_env()
+
 
 class K8sParserError(Exception):
     """Custom exception for K8s parsing errors"""
@@ -28,12 +248,72 @@ class K8sParserError(Exception):
     pass
 
 
-def parse_k8s_yaml(yaml_content: str) -> Dict[str, Any]:
+def _load(yaml_content: Union[str, bytes, mmap.mmap]) -> Any:
+    """
+    Load a YAML document, taking the orjson fast path for JSON input.
+
+    Args:
+        yaml_content (Union[str, bytes, mmap.mmap]): YAML or JSON document
+
+    Returns:
+        Any: The loaded document
+    """
+    if yaml_content[:_JSON_SNIFF_SIZE].lstrip()[:1] in ("{", b"{"):
+        try:
+            if isinstance(yaml_content, mmap.mmap):
+                return orjson.loads(memoryview(yaml_content))
+            return orjson.loads(yaml_content)
+        except orjson.JSONDecodeError:
+            # A YAML flow mapping rather than JSON
+            pass
+    # libyaml reads an mmap through its file interface, chunk by chunk
+    return yaml.load(yaml_content, Loader=K8sLoader)
+
+
+def configure_parse_cache(maxsize: int) -> None:
+    """
+    Set the number of parsed manifests kept in the parse cache.
+
+    Args:
+        maxsize (int): Maximum number of cached manifests; 0 disables the cache
+
+    Raises:
+        ValueError: If maxsize is negative
+    """
+    if maxsize < 0:
+        raise ValueError(f"Parse cache size must not be negative: {maxsize}")
+
+    global _parse_cache_size
+    with _parse_cache_lock:
+        _parse_cache_size = maxsize
+        while len(_parse_cache) > maxsize:
+            _parse_cache.popitem(last=False)
+
+
+def get_parse_cache_size() -> int:
+    """Return the maximum number of cached manifests (0 when disabled)"""
+    return _parse_cache_size
+
+
+def _copy_tree(value: Any) -> Any:
+    """Copy the dicts and lists of a parsed manifest; scalars are immutable"""
+    if isinstance(value, dict):
+        return {key: _copy_tree(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_tree(item) for item in value]
+    return value
+
+
+def parse_k8s_yaml(yaml_content: Union[str, bytes, mmap.mmap]) -> Dict[str, Any]:
     """
     Parse Kubernetes YAML manifest and convert it to dictionary format.
 
+    When the parse cache is enabled, repeated content returns a copy of the
+    cached result instead of being parsed again.
+
     Args:
-        yaml_content (str): YAML string containing Kubernetes resource definition
+        yaml_content (Union[str, bytes, mmap.mmap]): YAML string, raw bytes or
+            a memory-mapped file containing Kubernetes resource definition
 
     Returns:
         Dict[str, Any]: Dictionary representation of the Kubernetes resource
@@ -41,97 +321,242 @@ def parse_k8s_yaml(yaml_content: str) -> Dict[str, Any]:
     Raises:
         K8sParserError: If the YAML is invalid or doesn't conform to K8s resource format
     """
-    try:
-        logger.debug("Attempting to parse YAML content")
-        k8s_dict = yaml.safe_load(yaml_content)
+    if not _parse_cache_size:
+        return _parse_k8s_yaml(yaml_content)
+
+    raw = yaml_content
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    digest = hashlib.blake2b(raw, digest_size=16).digest()
+
+    with _parse_cache_lock:
+        cached = _parse_cache.get(digest)
+        if cached is not None:
+            _parse_cache.move_to_end(digest)
+    if cached is not None:
+        return _copy_tree(cached)
+
+    # Errors propagate before anything is stored, so they are never cached
+    k8s_dict = _parse_k8s_yaml(yaml_content)
+
+    with _parse_cache_lock:
+        _parse_cache[digest] = _copy_tree(k8s_dict)
+        while len(_parse_cache) > _parse_cache_size:
+            _parse_cache.popitem(last=False)
+    return k8s_dict
+
+
+def _contains(
+    content: Union[str, bytes, mmap.mmap], find_re: re.Pattern, confirm_re: re.Pattern
+) -> bool:
+    """
+    Search a document with a fast literal-first pattern, confirming each
+    candidate with an anchored pattern that checks its surroundings.
 
-        if not isinstance(k8s_dict, dict):
-            raise K8sParserError("Invalid YAML: must be a mapping")
+    Args:
+        content (Union[str, bytes, mmap.mmap]): YAML or JSON document
+        find_re (re.Pattern): Pattern finding candidates
+        confirm_re (re.Pattern): Pattern that must match at a candidate's start
 
-        # Validate against basic K8s schema
-        logger.debug("Validating against Kubernetes schema")
-        validate(instance=k8s_dict, schema=K8S_SCHEMA)
+    Returns:
+        bool: True if a candidate is confirmed
+    """
+    match = find_re.search(content)
+    while match is not None:
+        if confirm_re.match(content, match.start()):
+            return True
+        match = find_re.search(content, match.start() + 1)
+    return False
 
-        return k8s_dict
 
-    except ParserError as e:
-        logger.error(f"YAML parsing error: {str(e)}")
-        raise K8sParserError(f"Invalid YAML format: {str(e)}")
-    except Exception as e:
-        logger.error(f"Error processing Kubernetes resource: {str(e)}")
-        raise K8sParserError(str(e))
+def _has_control_char(content: Union[str, bytes, mmap.mmap]) -> bool:
+    """
+    Check whether a document contains a control character YAML doesn't allow.
 
+    Args:
+        content (Union[str, bytes, mmap.mmap]): YAML or JSON document
 
-def process_file(input_file: Path, output_dir: Path, pretty: bool = True) -> bool:
+    Returns:
+        bool: True if the document contains a control character
+    """
+    if isinstance(content, str):
+        if not content.isascii():
+            return _CONTROL_CHAR_RE.search(content) is not None
+        # Encoding ASCII text is a plain copy
+        content = content.encode("ascii")
+    if isinstance(content, bytes):
+        return bool(content.translate(None, _NON_CONTROL_BYTES))
+    return any(
+        content[start : start + _CONTROL_SCAN_CHUNK].translate(None, _NON_CONTROL_BYTES)
+        for start in range(0, len(content), _CONTROL_SCAN_CHUNK)
+    )
+
+
+def _precheck(yaml_content: Union[str, bytes, mmap.mmap]) -> None:
     """
-    Process a single YAML file and convert it to JSON.
+    Reject empty or binary documents without parsing them.
+
+    Whether the required keys are present is left to the parser and the
+    schema: a scan for them can't see keys spelled with escapes.
 
     Args:
-        input_file (Path): Path to the input YAML file
-        output_dir (Path): Directory to save the output JSON file
-        pretty (bool): Whether to format JSON with indentation
+        yaml_content (Union[str, bytes, mmap.mmap]): YAML or JSON document
+
+    Raises:
+        K8sParserError: If the document cannot be a Kubernetes resource
+    """
+    if isinstance(yaml_content, str):
+        blank_re, control_re = _BLANK_RE, _CONTROL_CHAR_RE
+    else:
+        blank_re, control_re = _BLANK_BYTES_RE, _CONTROL_BYTE_RE
+
+    if blank_re.match(yaml_content):
+        raise K8sParserError("Invalid YAML: must be a mapping")
+
+    if yaml_content[:2] in _UTF16_BOMS:
+        # libyaml decodes UTF-16 itself, NUL bytes included
+        return
+
+    if _has_control_char(yaml_content):
+        control = control_re.search(yaml_content)
+        raise K8sParserError(
+            "Invalid YAML format: unacceptable control character "
+            f"#x{ord(control.group()):04x} at position {control.start()}"
+        )
+
+
+def parse_k8s_yaml_stream(stream: BinaryIO) -> Dict[str, Any]:
+    """
+    Parse a Kubernetes manifest from a binary file object.
+
+    The stream goes through the same precheck, JSON fast path and cache as
+    parse_k8s_yaml. Large streams backed by a file are memory-mapped like
+    large files in yaml_file_to_json; anything else is read into memory.
+
+    Args:
+        stream (BinaryIO): File object positioned at the start of the manifest
 
     Returns:
-        bool: True if successful, False otherwise
+        Dict[str, Any]: Dictionary representation of the Kubernetes resource
+
+    Raises:
+        K8sParserError: If the YAML is invalid or doesn't conform to K8s resource format
+    """
+    start = stream.tell()
+    size = stream.seek(0, os.SEEK_END) - start
+    stream.seek(start)
+
+    if start == 0 and size >= MMAP_THRESHOLD:
+        try:
+            fileno = stream.fileno()
+        except (AttributeError, OSError):
+            fileno = None
+        if fileno is not None:
+            # Buffered writes have to reach the file before it is mapped
+            stream.flush()
+            with mmap.mmap(fileno, size, access=mmap.ACCESS_READ) as mm:
+                return parse_k8s_yaml(mm)
+    return parse_k8s_yaml(stream.read())
+
+
+def parse_k8s_yaml_all(
+    yaml_content: Union[str, bytes, mmap.mmap],
+) -> List[Dict[str, Any]]:
     """
+    Parse a YAML stream that may hold several manifests separated by '---'.
+
+    Content without a document marker takes the parse_k8s_yaml path, with
+    its prescan, JSON fast path and cache. Otherwise all documents are loaded
+    in a single libyaml pass; empty documents, as left by a leading or
+    trailing '---', are skipped.
+
+    Args:
+        yaml_content (Union[str, bytes, mmap.mmap]): YAML stream
+
+    Returns:
+        List[Dict[str, Any]]: The manifests, in stream order
+
+    Raises:
+        K8sParserError: If the YAML is invalid or any document doesn't conform
+            to K8s resource format
+    """
+    if isinstance(yaml_content, str):
+        marker_re, marker_at_re = _DOC_MARKER_RE, _DOC_MARKER_AT_RE
+    else:
+        marker_re, marker_at_re = _DOC_MARKER_BYTES_RE, _DOC_MARKER_BYTES_AT_RE
+    if not _contains(yaml_content, marker_re, marker_at_re):
+        return [parse_k8s_yaml(yaml_content)]
+
     try:
-        # Create output filename with .json extension
-        output_file = output_dir / f"{input_file.stem}.json"
-
-        # Convert YAML to JSON
-        logger.info(f"Processing {input_file}")
-        json_data = yaml_file_to_json(input_file)
-
-        # Save JSON to file
-        save_json_to_file(json_data, output_file, pretty)
-        logger.info(f"Successfully converted {input_file} to {output_file}")
-        return True
-    except K8sParserError as e:
-        logger.error(f"Failed to convert {input_file}: {str(e)}")
-        return False
-    except Exception as e:
-        logger.error(f"Unexpected error processing {input_file}: {str(e)}")
-        return False
+        documents = [
+            document
+            for document in yaml.load_all(yaml_content, Loader=K8sLoader)
+            if document is not None
+        ]
+    except yaml.YAMLError as e:
+        logger.error("YAML parsing error: %s", e)
+        raise K8sParserError(f"Invalid YAML format: {str(e)}")
+
+    if not documents:
+        raise K8sParserError("Invalid YAML: must be a mapping")
 
+    manifests = []
+    for index, document in enumerate(documents):
+        try:
+            manifests.append(_validate(document))
+        except Exception as e:
+            logger.error("Error processing Kubernetes resource %d: %s", index, e)
+            raise K8sParserError(f"Document {index}: {str(e)}")
+    return manifests
 
-def process_directory(
-    input_dir: Path, output_dir: Path, pretty: bool = True, recursive: bool = False
-) -> tuple[int, int]:
+
+def _validate(k8s_dict: Any) -> Dict[str, Any]:
     """
-    Process all YAML files in a directory and convert them to JSON.
+    Check that a loaded document is a mapping that conforms to K8S_SCHEMA.
 
     Args:
-        input_dir (Path): Directory containing input YAML files
-        output_dir (Path): Directory to save the output JSON files
-        pretty (bool): Whether to format JSON with indentation
-        recursive (bool): Whether to recursively process subdirectories
+        k8s_dict (Any): Loaded document
 
     Returns:
-        tuple[int, int]: (number of successful conversions, total number of files processed)
+        Dict[str, Any]: The document
+
+    Raises:
+        K8sParserError: If the document is not a mapping
+        jsonschema.ValidationError: If the document doesn't conform to K8S_SCHEMA
     """
-    # Create output directory if it doesn't exist
-    output_dir.mkdir(parents=True, exist_ok=True)
+    if not isinstance(k8s_dict, dict):
+        raise K8sParserError("Invalid YAML: must be a mapping")
+
+    if not _is_valid_manifest(k8s_dict):
+        from jsonschema.exceptions import best_match
 
-    # Find all YAML files in the directory
-    pattern = "**/*.y*ml" if recursive else "*.y*ml"
-    yaml_files = list(input_dir.glob(pattern))
+        error = best_match(_get_validator().iter_errors(k8s_dict))
+        if error is not None:
+            raise error
+    return k8s_dict
 
-    successful = 0
-    total = len(yaml_files)
 
-    for yaml_file in yaml_files:
-        # For recursive processing, maintain directory structure
-        if recursive and yaml_file.parent != input_dir:
-            relative_path = yaml_file.parent.relative_to(input_dir)
-            file_output_dir = output_dir / relative_path
-            file_output_dir.mkdir(parents=True, exist_ok=True)
-        else:
-            file_output_dir = output_dir
+def _parse_k8s_yaml(yaml_content: Union[str, bytes, mmap.mmap]) -> Dict[str, Any]:
+    """Parse and validate a manifest; see parse_k8s_yaml"""
+    try:
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Attempting to parse YAML content")
 
-        if process_file(yaml_file, file_output_dir, pretty):
-            successful += 1
+        _precheck(yaml_content)
+        k8s_dict = _load(yaml_content)
 
-    return successful, total
+        # Validate against basic K8s schema
+        if debug:
+            logger.debug("Validating against Kubernetes schema")
+        return _validate(k8s_dict)
+
+    except yaml.YAMLError as e:
+        logger.error("YAML parsing error: %s", e)
+        raise K8sParserError(f"Invalid YAML format: {str(e)}")
+    except Exception as e:
+        logger.error("Error processing Kubernetes resource: %s", e)
+        raise K8sParserError(str(e))
 
 
 def yaml_file_to_json(file_path: Union[str, Path]) -> Dict[str, Any]:
@@ -147,21 +572,115 @@ def yaml_file_to_json(file_path: Union[str, Path]) -> Dict[str, Any]:
     Raises:
         K8sParserError: If the file cannot be read or the YAML is invalid
     """
+    return _parse_file(file_path, parse_k8s_yaml)
+
+
+def yaml_file_to_json_all(file_path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """
+    Convert a YAML file holding one or more Kubernetes manifests to dictionaries.
+
+    Args:
+        file_path (Union[str, pathlib.Path]): Path to the YAML file
+
+    Returns:
+        List[Dict[str, Any]]: The manifests, in file order
+
+    Raises:
+        K8sParserError: If the file cannot be read or the YAML is invalid
+    """
+    return _parse_file(file_path, parse_k8s_yaml_all)
+
+
+_T = TypeVar("_T")
+
+
+def _parse_file(
+    file_path: Union[str, Path], parse: Callable[[Union[bytes, mmap.mmap]], _T]
+) -> _T:
+    """Read a file, memory-mapping large ones, and parse it with parse"""
     try:
-        with open(file_path, "r") as f:
-            yaml_content = f.read()
-        return parse_k8s_yaml(yaml_content)
+        with open(file_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            # mmap setup costs more than a plain read for small files
+            if size < MMAP_THRESHOLD:
+                yaml_content = f.read()
+            else:
+                # Parsed straight from the mapping, without a copy in memory
+                with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+                    return parse(mm)
+        return parse(yaml_content)
     except FileNotFoundError:
-        logger.error(f"File not found: {file_path}")
+        logger.error("File not found: %s", file_path)
         raise K8sParserError(f"File not found: {file_path}")
     except PermissionError:
-        logger.error(f"Permission denied when reading file: {file_path}")
+        logger.error("Permission denied when reading file: %s", file_path)
         raise K8sParserError(f"Permission denied when reading file: {file_path}")
     except Exception as e:
-        logger.error(f"Error reading file {file_path}: {str(e)}")
+        logger.error("Error reading file %s: %s", file_path, e)
         raise K8sParserError(f"Error reading file {file_path}: {str(e)}")
 
 
+def serialize_json(json_data: Dict[str, Any], pretty: bool = True) -> bytes:
+    """
+    Serialize JSON data to bytes.
+
+    Args:
+        json_data (Dict[str, Any]): Dictionary to serialize
+        pretty (bool): Whether to format JSON with indentation
+
+    Returns:
+        bytes: UTF-8 encoded JSON document
+
+    NaN and infinite floats are written as null, since JSON has no literal
+    for them. Documents with integers beyond 64 bits are serialized with the
+    json module instead, which writes those floats as NaN and Infinity.
+    """
+    option = orjson.OPT_NON_STR_KEYS
+    if pretty:
+        option |= orjson.OPT_INDENT_2
+    try:
+        return orjson.dumps(json_data, option=option)
+    except TypeError:
+        # orjson only handles 64-bit integers; YAML allows any size
+        separators = None if pretty else (",", ":")
+        return json.dumps(
+            json_data, indent=2 if pretty else None, separators=separators
+        ).encode("utf-8")
+
+
+def write_json_file(payload: bytes, output_path: Union[str, Path]) -> None:
+    """
+    Write a serialized JSON document to a file.
+
+    Args:
+        payload (bytes): Serialized JSON, as returned by serialize_json
+        output_path (Union[str, pathlib.Path]): Path to save the JSON file
+
+    Raises:
+        K8sParserError: If the file cannot be written
+    """
+    try:
+        # Written straight to the descriptor, without a buffered file object
+        # in between; a regular file takes the payload in one write
+        fd = os.open(
+            output_path,
+            os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0),
+            0o666,
+        )
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view) :]
+        finally:
+            os.close(fd)
+    except PermissionError:
+        logger.error("Permission denied when writing to file: %s", output_path)
+        raise K8sParserError(f"Permission denied when writing to file: {output_path}")
+    except Exception as e:
+        logger.error("Error writing to file %s: %s", output_path, e)
+        raise K8sParserError(f"Error writing to file {output_path}: {str(e)}")
+
+
 def save_json_to_file(
     json_data: Dict[str, Any],
     output_path: Union[str, Path],
@@ -176,16 +695,14 @@ def save_json_to_file(
         pretty (bool): Whether to format JSON with indentation
 
     Raises:
-        K8sParserError: If the file cannot be written
+        K8sParserError: If the data cannot be serialized or the file cannot be written
     """
     try:
-        indent = 2 if pretty else None
-        with open(output_path, "w") as f:
-            json.dump(json_data, f, indent=indent)
-        logger.info(f"JSON saved to {output_path}")
-    except PermissionError:
-        logger.error(f"Permission denied when writing to file: {output_path}")
-        raise K8sParserError(f"Permission denied when writing to file: {output_path}")
+        payload = serialize_json(json_data, pretty)
     except Exception as e:
-        logger.error(f"Error writing to file {output_path}: {str(e)}")
+        logger.error("Error serializing JSON for %s: %s", output_path, e)
         raise K8sParserError(f"Error writing to file {output_path}: {str(e)}")
+
+    write_json_file(payload, output_path)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("JSON saved to %s", output_path)
@@ -1,4 +1,8 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
 
 
 def setup_logger():
@@ -10,4 +14,79 @@ def setup_logger():
     return logging.getLogger(__name__)
 
 
+def skip_unused_record_fields() -> None:
+    """
+    Stop log records collecting the thread and process fields.
+
+    The log format shows none of them; see "Optimization" in the logging
+    HOWTO. The switches apply to every logger in the process, so they are
+    set by the CLI and the API server rather than when this module is
+    imported.
+    """
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue handler that leaves message formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so the record does not need to
+        # be made picklable by formatting it up front
+        return record
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+def setup_queue_logging() -> None:
+    """
+    Route root log records through a queue drained by a background thread.
+
+    Callers then only enqueue records, while formatting and writing happen
+    on the listener thread. Safe to call more than once.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    skip_unused_record_fields()
+
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    for handler in handlers:
+        root.removeHandler(handler)
+    _queue_handler = _DeferredQueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_queue_logging)
+
+
+def stop_queue_logging() -> None:
+    """
+    Undo setup_queue_logging: flush the queue, stop the listener thread and
+    give the root logger its handlers back. Safe to call more than once.
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+
+    # Stopping the listener handles the records still in the queue
+    _listener.stop()
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    for handler in _listener.handlers:
+        root.addHandler(handler)
+
+    atexit.unregister(stop_queue_logging)
+    _listener = None
+    _queue_handler = None
+
+
 logger = setup_logger()
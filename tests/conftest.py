@@ -1,13 +1,19 @@
 import pytest
-import os
-import sys
-
-# Add the project root to the Python path
-sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
 
 
 # Common test fixtures
-@pytest.fixture
+@pytest.fixture(scope="session")
+def client():
+    """Return an API test client shared by the whole test session"""
+    from fastapi.testclient import TestClient
+    from k8s_converter.api.app import app
+
+    # Entering the client runs the app's startup and shutdown events once
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
 def sample_pod_yaml():
     """Return a sample Kubernetes Pod YAML for testing"""
     return """
@@ -22,7 +28,7 @@ def sample_pod_yaml():
     """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_deployment_yaml():
     """Return a sample Kubernetes Deployment YAML for testing"""
     return """
@@ -47,10 +53,22 @@ def sample_deployment_yaml():
             image: nginx:1.14.2
             ports:
             - containerPort: 80
+            env:
+            - name: NGINX_HOST
+              value: example.com
+            - name: NGINX_PORT
+              value: "80"
+            resources:
+              limits:
+                cpu: 500m
+                memory: 512Mi
+              requests:
+                cpu: 200m
+                memory: 256Mi
     """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def invalid_yaml():
     """Return an invalid YAML string for testing"""
     return """
@@ -60,15 +78,11 @@ def invalid_yaml():
       name: test-pod
       labels:
         app: test
-      annotations:
-    spec:  # Missing colon after annotations
-      containers:
-      - name: nginx
-        image: nginx:latest
+      this is invalid yaml
     """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def non_k8s_yaml():
     """Return a valid YAML that is not a Kubernetes resource"""
     return """
@@ -77,3 +91,21 @@ def non_k8s_yaml():
       - one
       - two
     """
+
+
+@pytest.fixture(scope="session")
+def sample_yaml_files(
+    tmp_path_factory,
+    sample_pod_yaml,
+    sample_deployment_yaml,
+    invalid_yaml,
+    non_k8s_yaml,
+):
+    """Write the sample manifests once and return the directory holding them"""
+    samples_dir = tmp_path_factory.mktemp("yaml_samples")
+    (samples_dir / "valid.yaml").write_text(sample_pod_yaml)
+    (samples_dir / "complex.yaml").write_text(sample_deployment_yaml)
+    (samples_dir / "invalid.yaml").write_text(invalid_yaml)
+    (samples_dir / "non_k8s.yaml").write_text(non_k8s_yaml)
+    (samples_dir / "binary.bin").write_bytes(b"\x00\x01\x02\x03\x04\x05")
+    return samples_dir
@@ -1,13 +1,19 @@
-from fastapi.testclient import TestClient
-from k8s_converter.api.app import app
+import asyncio
+import logging
+from logging.handlers import QueueHandler
+from unittest.mock import patch
 
-client = TestClient(app)
+import pytest
+from fastapi import HTTPException
+
+from k8s_converter.api import app as api_app, formparser
+from k8s_converter.api.app import BATCH_POOL_THRESHOLD, convert_raw_yaml, start_server
 
 
 class TestApiEndpoints:
     """Test cases for the API endpoints"""
 
-    def test_root_endpoint(self):
+    def test_root_endpoint(self, client):
         """Test the root endpoint returns API information"""
         response = client.get("/")
         assert response.status_code == 200
@@ -16,20 +22,19 @@ class TestApiEndpoints:
         assert "version" in data
         assert "endpoints" in data
 
-    def test_convert_raw_yaml_valid(self):
+    def test_lifespan_queue_logging(self, client):
+        """Test that the running app logs through the root queue handler"""
+        assert any(
+            isinstance(handler, QueueHandler)
+            for handler in logging.getLogger().handlers
+        )
+
+    def test_convert_raw_yaml_valid(self, client, sample_pod_yaml):
         """Test converting valid raw YAML"""
-        yaml_content = """
-        apiVersion: v1
-        kind: Pod
-        metadata:
-          name: test-pod
-        spec:
-          containers:
-          - name: nginx
-            image: nginx:latest
-        """
         response = client.post(
-            "/convert/raw", content=yaml_content, headers={"Content-Type": "text/plain"}
+            "/convert/raw",
+            content=sample_pod_yaml,
+            headers={"Content-Type": "text/plain"},
         )
         assert response.status_code == 200
         data = response.json()
@@ -37,65 +42,49 @@ class TestApiEndpoints:
         assert data["json_content"]["kind"] == "Pod"
         assert data["json_content"]["metadata"]["name"] == "test-pod"
 
-    def test_convert_raw_yaml_invalid(self):
-        """Test converting invalid raw YAML"""
-        yaml_content = """
-        apiVersion: v1
-        kind: Pod
-        metadata:
-          name: test-pod
-          this is invalid yaml
-        """
+    @pytest.mark.parametrize("yaml_fixture", ["invalid_yaml", "non_k8s_yaml"])
+    def test_convert_raw_yaml_rejected(self, request, yaml_fixture):
+        """Test converting invalid or non-Kubernetes raw YAML"""
+        # Nothing here depends on HTTP handling, so the endpoint is called directly
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(convert_raw_yaml(request.getfixturevalue(yaml_fixture)))
+        assert exc_info.value.status_code == 400
+        assert exc_info.value.detail
+
+    def test_convert_raw_yaml_empty(self, client):
+        """Test converting empty YAML"""
         response = client.post(
-            "/convert/raw", content=yaml_content, headers={"Content-Type": "text/plain"}
+            "/convert/raw", content="", headers={"Content-Type": "text/plain"}
         )
-        assert response.status_code == 400
+        assert response.status_code == 422  # FastAPI returns 422 for empty body
         data = response.json()
         assert "detail" in data
 
-    def test_convert_raw_yaml_non_kubernetes(self):
-        """Test converting non-Kubernetes YAML"""
-        yaml_content = """
-        foo: bar
-        items:
-          - one
-          - two
-        """
+    def test_convert_raw_yaml_large_integer(self, client, sample_pod_yaml):
+        """Test converting YAML with an integer beyond 64 bits"""
         response = client.post(
-            "/convert/raw", content=yaml_content, headers={"Content-Type": "text/plain"}
+            "/convert/raw",
+            content=f"{sample_pod_yaml}\n    n: 123456789012345678901234567890",
+            headers={"Content-Type": "text/plain"},
         )
-        assert response.status_code == 400
-        data = response.json()
-        assert "detail" in data
+        assert response.status_code == 200
+        assert response.json()["json_content"]["n"] == 123456789012345678901234567890
 
-    def test_convert_raw_yaml_empty(self):
-        """Test converting empty YAML"""
+    def test_convert_raw_yaml_not_utf8(self, client, sample_pod_yaml):
+        """Test that raw YAML which is not valid UTF-8 is rejected by the parser"""
         response = client.post(
-            "/convert/raw", content="", headers={"Content-Type": "text/plain"}
+            "/convert/raw",
+            content=sample_pod_yaml.encode().replace(b"test-pod", b"test-\xff"),
+            headers={"Content-Type": "text/plain"},
         )
-        assert response.status_code == 422  # FastAPI returns 422 for empty body
-        data = response.json()
-        assert "detail" in data
+        assert response.status_code == 400
+        assert "invalid leading UTF-8 octet" in response.json()["detail"]
 
-    def test_convert_file_valid(self, tmp_path):
+    def test_convert_file_valid(self, client, sample_yaml_files):
         """Test converting a valid YAML file"""
-        # Create a temporary YAML file
-        yaml_content = """
-        apiVersion: v1
-        kind: Pod
-        metadata:
-          name: test-pod
-        spec:
-          containers:
-          - name: nginx
-            image: nginx:latest
-        """
-        temp_file = tmp_path / "test.yaml"
-        temp_file.write_text(yaml_content)
-
-        with open(temp_file, "rb") as f:
+        with open(sample_yaml_files / "valid.yaml", "rb") as f:
             response = client.post(
-                "/convert/file", files={"file": ("test.yaml", f, "text/plain")}
+                "/convert/file", files={"file": ("valid.yaml", f, "text/plain")}
             )
 
         assert response.status_code == 200
@@ -104,57 +93,21 @@ class TestApiEndpoints:
         assert data["json_content"]["kind"] == "Pod"
         assert data["json_content"]["metadata"]["name"] == "test-pod"
 
-    def test_convert_file_invalid(self, tmp_path):
-        """Test converting an invalid YAML file"""
-        # Create a temporary invalid YAML file
-        yaml_content = """
-        apiVersion: v1
-        kind: Pod
-        metadata:
-          name: test-pod
-          this is invalid yaml
-        """
-        temp_file = tmp_path / "invalid.yaml"
-        temp_file.write_text(yaml_content)
-
-        with open(temp_file, "rb") as f:
+    @pytest.mark.parametrize("filename", ["invalid.yaml", "non_k8s.yaml"])
+    def test_convert_file_rejected(self, client, sample_yaml_files, filename):
+        """Test converting an invalid or non-Kubernetes YAML file"""
+        with open(sample_yaml_files / filename, "rb") as f:
             response = client.post(
-                "/convert/file", files={"file": ("invalid.yaml", f, "text/plain")}
+                "/convert/file", files={"file": (filename, f, "text/plain")}
             )
 
         assert response.status_code == 400
         data = response.json()
         assert "detail" in data
 
-    def test_convert_file_non_kubernetes(self, tmp_path):
-        """Test converting a non-Kubernetes YAML file"""
-        # Create a temporary non-Kubernetes YAML file
-        yaml_content = """
-        foo: bar
-        items:
-          - one
-          - two
-        """
-        temp_file = tmp_path / "non-k8s.yaml"
-        temp_file.write_text(yaml_content)
-
-        with open(temp_file, "rb") as f:
-            response = client.post(
-                "/convert/file", files={"file": ("non-k8s.yaml", f, "text/plain")}
-            )
-
-        assert response.status_code == 400
-        data = response.json()
-        assert "detail" in data
-
-    def test_convert_file_binary(self, tmp_path):
+    def test_convert_file_binary(self, client, sample_yaml_files):
         """Test converting a binary file"""
-        # Create a temporary binary file
-        binary_data = b"\x00\x01\x02\x03\x04\x05"
-        temp_file = tmp_path / "binary.bin"
-        temp_file.write_bytes(binary_data)
-
-        with open(temp_file, "rb") as f:
+        with open(sample_yaml_files / "binary.bin", "rb") as f:
             response = client.post(
                 "/convert/file",
                 files={"file": ("binary.bin", f, "application/octet-stream")},
@@ -162,21 +115,35 @@ class TestApiEndpoints:
 
         assert response.status_code == 400
         data = response.json()
-        assert "detail" in data
+        assert "encoding" in data["detail"]
 
-    def test_convert_batch_valid(
-        self, tmp_path, sample_pod_yaml, sample_deployment_yaml
-    ):
-        """Test batch converting multiple valid YAML files"""
-        # Create temporary files
-        valid_file = tmp_path / "valid.yaml"
-        valid_file.write_text(sample_pod_yaml)
+    def test_convert_file_not_utf8(self, client):
+        """Test converting a file that is not UTF-8 encoded"""
+        content = "apiVersion: v1\nkind: Pod\nmetadata:\n  name: café\n"
+        response = client.post(
+            "/convert/file",
+            files={"file": ("latin1.yaml", content.encode("latin-1"), "text/plain")},
+        )
+        assert response.status_code == 400
+        assert "encoding" in response.json()["detail"]
 
-        complex_file = tmp_path / "complex.yaml"
-        complex_file.write_text(sample_deployment_yaml)
+        # A character split at the end of the sniffed bytes is still accepted
+        padded = "apiVersion: v1\nkind: Pod\nmetadata:\n  name: p\n#" + "x" * 465
+        content = padded + "é\n"
+        assert len(padded.encode("utf-8")) == 511
+        response = client.post(
+            "/convert/file",
+            files={"file": ("split.yaml", content.encode("utf-8"), "text/plain")},
+        )
+        assert response.status_code == 200
 
+    def test_convert_batch_valid(self, client, sample_yaml_files):
+        """Test batch converting multiple valid YAML files"""
         # Test batch conversion
-        with open(valid_file, "rb") as f1, open(complex_file, "rb") as f2:
+        with (
+            open(sample_yaml_files / "valid.yaml", "rb") as f1,
+            open(sample_yaml_files / "complex.yaml", "rb") as f2,
+        ):
             response = client.post(
                 "/convert/batch",
                 files=[
@@ -205,22 +172,14 @@ class TestApiEndpoints:
             assert "json_content" in file_result
             assert "filename" in file_result
 
-    def test_convert_batch_mixed(self, tmp_path, sample_pod_yaml, invalid_yaml):
+    def test_convert_batch_mixed(self, client, sample_yaml_files):
         """Test batch converting a mix of valid, invalid and binary files"""
-        # Create temporary files
-        valid_file = tmp_path / "valid.yaml"
-        valid_file.write_text(sample_pod_yaml)
-
-        invalid_file = tmp_path / "invalid.yaml"
-        invalid_file.write_text(invalid_yaml)
-
-        binary_file = tmp_path / "binary.bin"
-        binary_file.write_bytes(b"\x00\x01\x02\x03\x04\x05")
-
         # Test batch conversion
-        with open(valid_file, "rb") as f1, open(invalid_file, "rb") as f2, open(
-            binary_file, "rb"
-        ) as f3:
+        with (
+            open(sample_yaml_files / "valid.yaml", "rb") as f1,
+            open(sample_yaml_files / "invalid.yaml", "rb") as f2,
+            open(sample_yaml_files / "binary.bin", "rb") as f3,
+        ):
             response = client.post(
                 "/convert/batch",
                 files=[
@@ -233,10 +192,9 @@ class TestApiEndpoints:
         assert response.status_code == 200
         result = response.json()
 
-        # Verify the counts - note that the invalid_yaml fixture might actually be valid
-        # for the parser, so we just check that at least one file failed (the binary one)
-        assert result["successful"] >= 1
-        assert result["failed"] >= 1
+        # Only the valid file converts; the invalid and binary files fail
+        assert result["successful"] == 1
+        assert result["failed"] == 2
         assert len(result["results"]) == 3
 
         # Check individual results
@@ -256,3 +214,168 @@ class TestApiEndpoints:
         assert error_count >= 1
         # And the total matches the number of files
         assert success_count + error_count == 3
+
+    def test_convert_batch_process_pool(self, client, sample_pod_yaml, invalid_yaml):
+        """Test a batch large enough for part of it to be parsed in a process pool"""
+        count = BATCH_POOL_THRESHOLD + 3
+        files = [
+            ("files", (f"pod{i}.yaml", sample_pod_yaml.encode("utf-8"), "text/yaml"))
+            for i in range(count)
+        ]
+        files.append(
+            ("files", ("invalid.yaml", invalid_yaml.encode("utf-8"), "text/yaml"))
+        )
+
+        response = client.post("/convert/batch", files=files)
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result["successful"] == count
+        assert result["failed"] == 1
+        # Results keep the upload order
+        assert [r["filename"] for r in result["results"]] == [
+            name for _, (name, _, _) in files
+        ]
+        assert result["results"][-1]["status"] == "error"
+
+    def test_convert_batch_large_integer(self, client, sample_pod_yaml):
+        """Test that an integer beyond 64 bits in one file doesn't fail the batch"""
+        big = f"{sample_pod_yaml}\n    n: 123456789012345678901234567890"
+        response = client.post(
+            "/convert/batch",
+            files=[
+                ("files", ("pod.yaml", sample_pod_yaml.encode("utf-8"), "text/yaml")),
+                ("files", ("big.yaml", big.encode("utf-8"), "text/yaml")),
+            ],
+        )
+        assert response.status_code == 200
+        result = response.json()
+        assert result["successful"] == 2
+        assert result["results"][1]["json_content"]["n"] == (
+            123456789012345678901234567890
+        )
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            b"\xef\xbb\xbfapiVersion: v1\nkind: Pod\nmetadata:\n  name: x\n",
+            b'{"apiVersion": "v1", "kind": "Pod", "metadata": {}, "n": 1e3}',
+            b'{"apiVersion": "v1", "kind": "Pod", "metadata": {}, "n": 1e3}'
+            + b" " * (1024 * 1024),
+        ],
+        ids=["bom", "json", "large-json"],
+    )
+    def test_endpoints_agree(self, client, content):
+        """Test that the raw, file and batch endpoints convert content alike"""
+        raw = client.post(
+            "/convert/raw", content=content, headers={"Content-Type": "text/plain"}
+        )
+        file = client.post(
+            "/convert/file", files={"file": ("pod.yaml", content, "text/yaml")}
+        )
+        batch = client.post(
+            "/convert/batch", files=[("files", ("pod.yaml", content, "text/yaml"))]
+        )
+
+        assert raw.status_code == file.status_code == batch.status_code == 200
+        expected = raw.json()["json_content"]
+        assert file.json()["json_content"] == expected
+        assert batch.json()["results"][0]["json_content"] == expected
+
+    def test_convert_batch_no_files(self, client):
+        """Test batch conversion without any files in the 'files' field"""
+        response = client.post(
+            "/convert/batch",
+            files=[("other", ("pod.yaml", b"apiVersion: v1", "text/yaml"))],
+        )
+        assert response.status_code == 422
+
+    def test_convert_batch_not_multipart(self, client):
+        """Test batch conversion with a body that is not multipart form data"""
+        response = client.post(
+            "/convert/batch",
+            content=b"apiVersion: v1",
+            headers={"Content-Type": "text/plain"},
+        )
+        assert response.status_code == 400
+        assert "multipart/form-data" in response.json()["detail"]
+
+    def test_convert_batch_too_many_files(self, client, sample_pod_yaml, monkeypatch):
+        """Test that a batch with more files than allowed is rejected"""
+        monkeypatch.setattr(formparser, "MAX_FILES", 2)
+        files = [
+            ("files", (f"pod{i}.yaml", sample_pod_yaml.encode("utf-8"), "text/yaml"))
+            for i in range(3)
+        ]
+        response = client.post("/convert/batch", files=files)
+        assert response.status_code == 400
+        assert "Too many files" in response.json()["detail"]
+
+    @pytest.mark.parametrize(
+        "limit, detail",
+        [("MAX_PART_SIZE", "exceeds the maximum size"), ("MAX_TOTAL_SIZE", "total")],
+    )
+    def test_convert_batch_too_large(
+        self, client, sample_pod_yaml, monkeypatch, limit, detail
+    ):
+        """Test that files over the per-part or total size limit are rejected"""
+        content = sample_pod_yaml.encode("utf-8")
+        # Each file fits the limit on its own, so only the total can exceed it
+        size = len(content) if limit == "MAX_PART_SIZE" else len(content) * 2
+        monkeypatch.setattr(formparser, limit, size - 1)
+        files = [("files", (f"pod{i}.yaml", content, "text/yaml")) for i in range(2)]
+        response = client.post("/convert/batch", files=files)
+        assert response.status_code == 413
+        assert detail in response.json()["detail"]
+
+    def test_convert_batch_header_too_large(self, client, sample_pod_yaml, monkeypatch):
+        """Test that a part with an oversized header is rejected"""
+        monkeypatch.setattr(formparser, "MAX_HEADER_SIZE", 64)
+        response = client.post(
+            "/convert/batch",
+            files=[("files", ("x" * 64, sample_pod_yaml.encode("utf-8"), "text/yaml"))],
+        )
+        assert response.status_code == 400
+        assert "Part header exceeds" in response.json()["detail"]
+
+    def test_convert_batch_malformed_body(self, client):
+        """Test batch conversion with a multipart body that doesn't parse"""
+        response = client.post(
+            "/convert/batch",
+            content=b"no boundary here\r\n",
+            headers={"Content-Type": "multipart/form-data; boundary=xyz"},
+        )
+        assert response.status_code == 400
+        assert "Invalid multipart data" in response.json()["detail"]
+
+    def test_shutdown_batch_pool_only_stops_given_pool(self):
+        """Test that a broken pool that was already replaced isn't stopped again"""
+        with patch.object(api_app, "_batch_pool") as current:
+            api_app._shutdown_batch_pool(object(), wait=False)
+            current.shutdown.assert_not_called()
+            assert api_app._batch_pool is current
+
+            api_app._shutdown_batch_pool(current, wait=False)
+            current.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+            assert api_app._batch_pool is None
+
+    def test_start_server_shares_cpus_between_workers(self, monkeypatch):
+        """Test that the batch pools of all server workers fit the CPU count"""
+        # start_server sets the variable; this makes it restored afterwards
+        monkeypatch.setenv("K8S_CONVERTER_BATCH_WORKERS", "")
+        monkeypatch.setattr(api_app.os, "cpu_count", lambda: 8)
+        with patch("uvicorn.run"):
+            start_server(workers=4)
+        assert api_app._batch_pool_size() == 2
+
+        monkeypatch.setenv("K8S_CONVERTER_BATCH_WORKERS", "abc")
+        assert api_app._batch_pool_size() == 8
+
+    @pytest.mark.parametrize(
+        "kwargs", [{"workers": 0}, {"workers": -2}, {"batch_workers": 0}]
+    )
+    def test_start_server_invalid_workers(self, kwargs):
+        """Test that worker counts below 1 are rejected before starting uvicorn"""
+        with patch("uvicorn.run") as run, pytest.raises(ValueError):
+            start_server(**kwargs)
+        run.assert_not_called()
@@ -1,54 +1,58 @@
+import json
+import zipfile
 import pytest
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
-from k8s_converter.cli.bulk_converter import process_directory, process_file
+from k8s_converter.cli.bulk_converter import (
+    PARALLEL_THRESHOLD,
+    process_directory,
+    process_file,
+)
 from k8s_converter.core.converter import K8sParserError
 
 
+@pytest.fixture(scope="module")
+def module_tmp(tmp_path_factory):
+    """Return a scratch directory shared by the tests in this module"""
+    return tmp_path_factory.mktemp("bulk")
+
+
 class TestBulkConverter:
     """Test cases for the bulk converter functionality"""
 
-    @pytest.fixture
-    def sample_yaml_content(self):
-        """Sample YAML content for testing"""
-        return """
-        apiVersion: v1
-        kind: Pod
-        metadata:
-          name: test-pod
-        spec:
-          containers:
-          - name: nginx
-            image: nginx:latest
-        """
-
-    def test_process_file_error_handling(self, tmp_path):
+    def test_process_file_error_handling(self, invalid_yaml, module_tmp):
         """Test process_file error handling for invalid YAML"""
+        work_dir = module_tmp / "error_handling"
+        work_dir.mkdir()
+
         # Create a temporary YAML file with invalid content
-        input_file = tmp_path / "invalid.yaml"
-        input_file.write_text("invalid: yaml: content: - [")
+        input_file = work_dir / "invalid.yaml"
+        input_file.write_text(invalid_yaml)
 
         # Create a temporary output directory
-        output_dir = tmp_path / "output"
+        output_dir = work_dir / "output"
         output_dir.mkdir()
 
         # Process the file - should return False due to error
         result = process_file(input_file, output_dir)
         assert result is False
 
-    @patch("k8s_converter.cli.bulk_converter.yaml_file_to_json")
-    def test_process_file_unexpected_error(self, mock_yaml_to_json, tmp_path):
+    @patch("k8s_converter.cli.bulk_converter.yaml_file_to_json_all")
+    def test_process_file_unexpected_error(self, mock_yaml_to_json, module_tmp):
         """Test process_file handling of unexpected errors"""
+        work_dir = module_tmp / "unexpected_error"
+        work_dir.mkdir()
+
         # Mock yaml_file_to_json to raise an unexpected exception
         mock_yaml_to_json.side_effect = Exception("Unexpected error")
 
         # Create a temporary YAML file
-        input_file = tmp_path / "test.yaml"
+        input_file = work_dir / "test.yaml"
         input_file.write_text("apiVersion: v1\nkind: Pod")
 
         # Create a temporary output directory
-        output_dir = tmp_path / "output"
+        output_dir = work_dir / "output"
         output_dir.mkdir()
 
         # Process the file - should return False due to unexpected error
@@ -56,10 +60,13 @@ class TestBulkConverter:
         assert result is False
 
     @patch("k8s_converter.cli.bulk_converter.process_file")
-    def test_process_directory_recursive(self, mock_process_file, tmp_path):
+    def test_process_directory_recursive(self, mock_process_file, module_tmp):
         """Test process_directory with recursive option"""
+        work_dir = module_tmp / "recursive"
+        work_dir.mkdir()
+
         # Create directory structure
-        input_dir = tmp_path / "input"
+        input_dir = work_dir / "input"
         input_dir.mkdir()
         subdir = input_dir / "subdir"
         subdir.mkdir()
@@ -74,7 +81,7 @@ class TestBulkConverter:
         mock_process_file.return_value = True
 
         # Create output directory
-        output_dir = tmp_path / "output"
+        output_dir = work_dir / "output"
         output_dir.mkdir()
 
         # Process directory with recursive=True
@@ -84,3 +91,115 @@ class TestBulkConverter:
         assert successful == 2
         assert total == 2
         assert mock_process_file.call_count == 2
+
+        # The subdirectory structure should be mirrored in the output
+        assert (output_dir / "subdir").is_dir()
+        mock_process_file.assert_any_call(yaml_file2, output_dir / "subdir", True)
+
+    def test_process_directory_parallel(
+        self, sample_pod_yaml, invalid_yaml, module_tmp
+    ):
+        """Test process_directory converting files with a process pool"""
+        work_dir = module_tmp / "parallel"
+        work_dir.mkdir()
+
+        input_dir = work_dir / "input"
+        input_dir.mkdir()
+
+        # Create enough files to go through the process pool
+        count = PARALLEL_THRESHOLD + 2
+        for i in range(count):
+            (input_dir / f"test{i}.yaml").write_text(sample_pod_yaml)
+        (input_dir / "invalid.yaml").write_text(invalid_yaml)
+
+        output_dir = work_dir / "output"
+
+        successful, total = process_directory(input_dir, output_dir, jobs=2)
+
+        assert successful == count
+        assert total == count + 1
+        for i in range(count):
+            assert (output_dir / f"test{i}.json").exists()
+
+    def test_process_file_multiple_documents(
+        self, sample_pod_yaml, sample_deployment_yaml, module_tmp
+    ):
+        """Test that each manifest of a multi-document file gets its own output"""
+        work_dir = module_tmp / "multiple_documents"
+        work_dir.mkdir()
+
+        input_file = work_dir / "app.yaml"
+        input_file.write_text(f"{sample_pod_yaml}\n---\n{sample_deployment_yaml}")
+
+        assert process_file(input_file, work_dir) is True
+        assert not (work_dir / "app.json").exists()
+        assert json.loads((work_dir / "app.0.json").read_bytes())["kind"] == "Pod"
+        assert (
+            json.loads((work_dir / "app.1.json").read_bytes())["kind"] == "Deployment"
+        )
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_process_directory_bundle(
+        self, sample_pod_yaml, invalid_yaml, module_tmp, jobs
+    ):
+        """Test process_directory writing the outputs into a zip archive"""
+        work_dir = module_tmp / f"bundle_{jobs}"
+        work_dir.mkdir()
+
+        input_dir = work_dir / "input"
+        (input_dir / "subdir").mkdir(parents=True)
+
+        count = PARALLEL_THRESHOLD + 2
+        for i in range(count):
+            (input_dir / f"test{i}.yaml").write_text(sample_pod_yaml)
+        (input_dir / "subdir" / "nested.yaml").write_text(sample_pod_yaml)
+        (input_dir / "invalid.yaml").write_text(invalid_yaml)
+
+        output_dir = work_dir / "output"
+        bundle = work_dir / "output.zip"
+
+        successful, total = process_directory(
+            input_dir, output_dir, recursive=True, jobs=jobs, bundle=bundle
+        )
+
+        assert successful == count + 1
+        assert total == count + 2
+        assert not output_dir.exists()
+        with zipfile.ZipFile(bundle) as zf:
+            names = set(zf.namelist())
+            assert names == {f"test{i}.json" for i in range(count)} | {
+                "subdir/nested.json"
+            }
+            assert json.loads(zf.read("subdir/nested.json"))["kind"] == "Pod"
+
+    def test_process_directory_bundle_duplicate_names(
+        self, sample_pod_yaml, module_tmp
+    ):
+        """Test that inputs mapping to the same bundle member are reported"""
+        work_dir = module_tmp / "bundle_duplicates"
+        input_dir = work_dir / "input"
+        input_dir.mkdir(parents=True)
+        (input_dir / "a.yaml").write_text(sample_pod_yaml)
+        (input_dir / "a.yml").write_text(sample_pod_yaml)
+
+        # The parent directory of the bundle is created
+        bundle = work_dir / "missing" / "output.zip"
+
+        successful, total = process_directory(
+            input_dir, work_dir / "output", jobs=1, bundle=bundle
+        )
+
+        assert (successful, total) == (1, 2)
+        with zipfile.ZipFile(bundle) as zf:
+            assert zf.namelist() == ["a.json"]
+
+    def test_process_directory_bundle_not_writable(self, sample_pod_yaml, module_tmp):
+        """Test that a bundle path that can't be created raises K8sParserError"""
+        work_dir = module_tmp / "bundle_not_writable"
+        input_dir = work_dir / "input"
+        input_dir.mkdir(parents=True)
+        (input_dir / "a.yaml").write_text(sample_pod_yaml)
+
+        # The bundle path is an existing directory
+        with pytest.raises(K8sParserError, match="Cannot create bundle"):
+            process_directory(input_dir, work_dir / "output", bundle=input_dir)
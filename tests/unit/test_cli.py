@@ -1,5 +1,7 @@
-from pathlib import Path
-from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
 
 from k8s_converter.cli.args import add_common_cli_args, create_cli_parser
 from k8s_converter.cli.bulk_converter import run_cli
@@ -31,99 +33,110 @@ class TestCliBasic:
         assert args.input == "test_input"
         assert args.output == "test_output"
 
-    @patch("pathlib.Path.exists")
-    @patch("pathlib.Path.is_file")
-    @patch("pathlib.Path.is_dir")
-    @patch("pathlib.Path.mkdir")
-    @patch("k8s_converter.cli.bulk_converter.process_file")
-    def test_run_cli_file(
-        self, mock_process_file, mock_mkdir, mock_is_dir, mock_is_file, mock_exists
-    ):
+    @pytest.mark.parametrize("value", ["0", "-1", "abc"])
+    def test_create_cli_parser_invalid_jobs(self, value):
+        """Test that the number of jobs must be a positive integer"""
+        parser = create_cli_parser()
+        with pytest.raises(SystemExit):
+            parser.parse_args(["test_input", "-j", value])
+
+    @pytest.mark.parametrize("value", ["-1", "abc"])
+    def test_create_cli_parser_invalid_parse_cache(self, value):
+        """Test that the parse cache size must be a non-negative integer"""
+        parser = create_cli_parser()
+        with pytest.raises(SystemExit):
+            parser.parse_args(["test_input", "--parse-cache", value])
+
+    def test_run_cli_file(self, sample_pod_yaml, tmp_path):
         """Test running the CLI with a file input"""
-        # Mock the path checks
-        mock_exists.return_value = True
-        mock_is_file.return_value = True
-        mock_is_dir.return_value = False
-
-        # Mock the process_file function to return success
-        mock_process_file.return_value = True
-
-        # Create mock args
-        args = MagicMock()
-        args.input = "test.yaml"
-        args.output = "output_dir"
-        args.verbose = False
-        args.no_pretty = False
-        args.recursive = False
+        input_file = tmp_path / "test.yaml"
+        input_file.write_text(sample_pod_yaml)
+        output_dir = tmp_path / "output_dir"
+
+        # Build the parsed arguments
+        args = SimpleNamespace(
+            input=str(input_file),
+            output=str(output_dir),
+            verbose=False,
+            no_pretty=False,
+            recursive=False,
+            jobs=None,
+            parse_cache=0,
+            bundle=None,
+        )
 
         # Run the CLI
         exit_code = run_cli(args)
 
-        # Verify the result
+        # Verify the result; the output directory is created for the file
         assert exit_code == 0
-        mock_process_file.assert_called_once()
-        mock_mkdir.assert_called_once()
-
-    @patch("pathlib.Path.exists")
-    @patch("pathlib.Path.is_file")
-    @patch("pathlib.Path.is_dir")
-    @patch("pathlib.Path.mkdir")
-    @patch("k8s_converter.cli.bulk_converter.process_directory")
-    def test_run_cli_directory(
-        self, mock_process_directory, mock_mkdir, mock_is_dir, mock_is_file, mock_exists
-    ):
+        assert (output_dir / "test.json").exists()
+
+    def test_run_cli_directory(self, sample_pod_yaml, tmp_path):
         """Test running the CLI with a directory input"""
-        # Mock the path checks
-        mock_exists.return_value = True
-        mock_is_file.return_value = False
-        mock_is_dir.return_value = True
-
-        # Mock the process_directory function to return success
-        mock_process_directory.return_value = (3, 3)
-
-        # Create mock args
-        args = MagicMock()
-        args.input = "test_dir"
-        args.output = "output_dir"
-        args.verbose = True
-        args.no_pretty = True
-        args.recursive = True
+        input_dir = tmp_path / "test_dir"
+        (input_dir / "subdir").mkdir(parents=True)
+        for name in ("test0.yaml", "test1.yaml", "subdir/test2.yaml"):
+            (input_dir / name).write_text(sample_pod_yaml)
+        output_dir = tmp_path / "output_dir"
+
+        # Build the parsed arguments
+        args = SimpleNamespace(
+            input=str(input_dir),
+            output=str(output_dir),
+            verbose=True,
+            no_pretty=True,
+            recursive=True,
+            jobs=None,
+            parse_cache=0,
+            bundle=None,
+        )
 
         # Run the CLI
         exit_code = run_cli(args)
 
-        # Verify the result
+        # Verify the result; recursion mirrors the subdirectory in the output
         assert exit_code == 0
-        mock_process_directory.assert_called_once()
-        # Note: mkdir is not called directly in this code path as it's handled within process_directory
-
-        # Verify that process_directory was called with the correct paths
-        # The first two positional arguments should be Path objects
-        args, kwargs = mock_process_directory.call_args
-        assert len(args) >= 2
-        assert isinstance(args[0], Path)  # input_dir
-        assert isinstance(args[1], Path)  # output_dir
-
-        # Check if recursive was passed correctly (might be positional or keyword)
-        if "recursive" in kwargs:
-            assert kwargs["recursive"] is True
-
-    @patch("pathlib.Path.exists")
-    def test_run_cli_nonexistent_path(self, mock_exists):
-        """Test running the CLI with a nonexistent path"""
-        # Mock the path check to return False
-        mock_exists.return_value = False
+        for name in ("test0.json", "test1.json", "subdir/test2.json"):
+            assert (output_dir / name).exists()
+
+    def test_run_cli_bundle_not_writable(self, sample_pod_yaml, tmp_path):
+        """Test that a bundle that can't be created fails the CLI run"""
+        input_dir = tmp_path / "test_dir"
+        input_dir.mkdir()
+        (input_dir / "test.yaml").write_text(sample_pod_yaml)
+
+        # The bundle's parent is a file, so it can't be made a directory
+        args = SimpleNamespace(
+            input=str(input_dir),
+            output=str(tmp_path / "output_dir"),
+            verbose=False,
+            no_pretty=False,
+            recursive=False,
+            jobs=None,
+            parse_cache=0,
+            bundle=str(input_dir / "test.yaml" / "out.zip"),
+        )
 
-        # Create mock args
-        args = MagicMock()
-        args.input = "nonexistent_path"
-        args.output = "output_dir"
-        args.verbose = False
-        args.no_pretty = False
-        args.recursive = False
+        assert run_cli(args) == 1
+
+    def test_run_cli_nonexistent_path(self, tmp_path):
+        """Test running the CLI with a nonexistent path"""
+        # Build the parsed arguments
+        args = SimpleNamespace(
+            input=str(tmp_path / "nonexistent_path"),
+            output=str(tmp_path / "output_dir"),
+            verbose=False,
+            no_pretty=False,
+            recursive=False,
+            jobs=None,
+            parse_cache=0,
+            bundle=None,
+        )
 
         # Run the CLI
         exit_code = run_cli(args)
 
         # Verify the result
         assert exit_code == 1  # Should return error code
+        assert not (tmp_path / "output_dir").exists()
@@ -1,31 +1,35 @@
+import io
 import pytest
 import json
+import subprocess
+import sys
+import yaml
+from jsonschema import Draft202012Validator
+
+from k8s_converter.cli.bulk_converter import process_file, process_directory
+from k8s_converter.core import converter
 from k8s_converter.core.converter import (
+    configure_parse_cache,
     parse_k8s_yaml,
+    parse_k8s_yaml_all,
+    parse_k8s_yaml_stream,
     K8sParserError,
+    K8S_SCHEMA,
+    K8sLoader,
+    MMAP_THRESHOLD,
     yaml_file_to_json,
     save_json_to_file,
-    process_file,
-    process_directory,
+    serialize_json,
+    _is_valid_manifest,
 )
 
 
 class TestConverter:
     """Test cases for the YAML to JSON converter"""
 
-    def test_parse_valid_yaml(self):
+    def test_parse_valid_yaml(self, sample_pod_yaml):
         """Test parsing a valid Kubernetes YAML"""
-        yaml_content = """
-        apiVersion: v1
-        kind: Pod
-        metadata:
-          name: test-pod
-        spec:
-          containers:
-          - name: nginx
-            image: nginx:latest
-        """
-        result = parse_k8s_yaml(yaml_content)
+        result = parse_k8s_yaml(sample_pod_yaml)
         assert isinstance(result, dict)
         assert result["apiVersion"] == "v1"
         assert result["kind"] == "Pod"
@@ -33,30 +37,11 @@ class TestConverter:
         assert len(result["spec"]["containers"]) == 1
         assert result["spec"]["containers"][0]["name"] == "nginx"
 
-    def test_parse_invalid_yaml_syntax(self):
-        """Test parsing YAML with invalid syntax"""
-        yaml_content = """
-        apiVersion: v1
-        kind: Pod
-        metadata:
-          name: test-pod
-          labels:
-            app: test
-          this is invalid yaml
-        """
-        with pytest.raises(K8sParserError):
-            parse_k8s_yaml(yaml_content)
-
-    def test_parse_non_kubernetes_yaml(self):
-        """Test parsing YAML that is not a Kubernetes resource"""
-        yaml_content = """
-        foo: bar
-        items:
-          - one
-          - two
-        """
+    @pytest.mark.parametrize("yaml_fixture", ["invalid_yaml", "non_k8s_yaml"])
+    def test_parse_rejected_yaml(self, request, yaml_fixture):
+        """Test parsing YAML with invalid syntax or that is not a Kubernetes resource"""
         with pytest.raises(K8sParserError):
-            parse_k8s_yaml(yaml_content)
+            parse_k8s_yaml(request.getfixturevalue(yaml_fixture))
 
     def test_parse_empty_yaml(self):
         """Test parsing empty YAML"""
@@ -68,44 +53,255 @@ class TestConverter:
         with pytest.raises(K8sParserError):
             parse_k8s_yaml("   \n   \t   ")
 
-    def test_complex_kubernetes_resource(self):
-        """Test parsing a complex Kubernetes resource with nested structures"""
+    def test_parse_missing_required_key(self):
+        """Test that documents without a required key are rejected"""
+        with pytest.raises(K8sParserError, match="'kind' is a required property"):
+            parse_k8s_yaml("apiVersion: v1\nmetadata: {name: p}")
+        with pytest.raises(K8sParserError, match="'metadata' is a required property"):
+            parse_k8s_yaml(b"apiVersion: v1\nkind: Pod")
+
+        # Keys that only appear inside values don't count
+        with pytest.raises(K8sParserError, match="'apiVersion' is a required property"):
+            parse_k8s_yaml("description: apiVersion, kind and metadata")
+
+        # Quoted, tagged, flow-style and escaped keys are accepted
+        for content in (
+            "\"apiVersion\": v1\n'kind': Pod\nmetadata: {}",
+            "!!str apiVersion : v1\nkind: Pod\nmetadata: {}",
+            "{apiVersion: v1,kind: Pod,metadata: {}}",
+            '{"api\\u0056ersion": "v1", "kind": "Pod", "metadata": {}}',
+        ):
+            assert parse_k8s_yaml(content)["kind"] == "Pod"
+
+        # UTF-16 input is left to the parser
+        content = "apiVersion: v1\nkind: Pod\nmetadata: {name: p}\n"
+        assert parse_k8s_yaml(content.encode("utf-16"))["kind"] == "Pod"
+
+    def test_parse_byte_order_mark(self):
+        """Test that manifests starting with a byte order mark are accepted"""
+        content = "apiVersion: v1\nkind: Pod\nmetadata:\n  name: x\n"
+        for document in (
+            b"\xef\xbb\xbf" + content.encode("utf-8"),
+            "\ufeff" + content,
+        ):
+            assert parse_k8s_yaml(document)["metadata"]["name"] == "x"
+
+    def test_parse_control_characters(self):
+        """Test that binary content is rejected before it is parsed"""
+        with pytest.raises(K8sParserError, match="#x0000 at position 0"):
+            parse_k8s_yaml(b"\x00\x01\x02\x03")
+        with pytest.raises(K8sParserError, match="#x001b"):
+            parse_k8s_yaml("apiVersion: v1\nkind: Pod\nmetadata: {name: \x1b}")
+        with pytest.raises(K8sParserError, match="#x007f"):
+            parse_k8s_yaml("apiVersion: v1\nkind: Pod\nmetadata: {name: caf\xe9\x7f}")
+
+    def test_control_character_in_large_file(self, tmp_path):
+        """Test that control characters are found anywhere in a mapped file"""
+        padding = "".join(f"key{i}: value\n" for i in range(120000))
+        yaml_file = tmp_path / "large.yaml"
+        yaml_file.write_bytes(
+            f"apiVersion: v1\nkind: Pod\nmetadata: {{}}\n{padding}x: \x1b\n".encode()
+        )
+        assert yaml_file.stat().st_size > 1024 * 1024
+
+        with pytest.raises(K8sParserError, match="#x001b"):
+            yaml_file_to_json(yaml_file)
+
+    def test_manifest_fast_path_matches_schema(self):
+        """Test that the hand-written manifest check agrees with K8S_SCHEMA"""
+        validator = Draft202012Validator(K8S_SCHEMA)
+        documents = [
+            {"apiVersion": "v1", "kind": "Pod", "metadata": {"name": "p"}},
+            {"apiVersion": "v1", "kind": "Pod", "metadata": {}},
+            {"apiVersion": "v1", "kind": "Pod", "metadata": {"name": 1}},
+            {"apiVersion": "v1", "kind": "Pod", "metadata": None},
+            {"apiVersion": 1, "kind": "Pod", "metadata": {}},
+            {"apiVersion": "v1", "kind": ["Pod"], "metadata": {}},
+            {"apiVersion": "v1", "kind": "Pod"},
+            {"kind": "Pod", "metadata": {}},
+            {},
+        ]
+        for document in documents:
+            assert _is_valid_manifest(document) == validator.is_valid(document)
+
+    def test_parse_yaml_bytes(self, sample_pod_yaml):
+        """Test parsing raw bytes and rejecting bytes that are not valid UTF-8"""
+        result = parse_k8s_yaml(sample_pod_yaml.encode("utf-8"))
+        assert result["kind"] == "Pod"
+
+        with pytest.raises(K8sParserError):
+            parse_k8s_yaml(b"apiVersion: v1\nkind: \xe9\nmetadata: {}")
+
+    def test_parse_yaml_stream(self, sample_pod_yaml, non_k8s_yaml):
+        """Test parsing a manifest from a binary file object"""
+        result = parse_k8s_yaml_stream(io.BytesIO(sample_pod_yaml.encode("utf-8")))
+        assert result["kind"] == "Pod"
+
+        for content in (b"", non_k8s_yaml.encode("utf-8"), b"kind: \xe9"):
+            with pytest.raises(K8sParserError):
+                parse_k8s_yaml_stream(io.BytesIO(content))
+
+    def test_parse_yaml_stream_large_file(self, tmp_path):
+        """Test that large file-backed streams are parsed like parse_k8s_yaml"""
+        padding = " " * MMAP_THRESHOLD
+        content = '{"apiVersion": "v1", "kind": "Pod", "metadata": {}, "n": 1e3}'
+        with open(tmp_path / "large.json", "w+b") as f:
+            f.write(f"{content}{padding}".encode("utf-8"))
+            f.seek(0)
+            result = parse_k8s_yaml_stream(f)
+        assert result["n"] == 1000.0
+
+    def test_parse_multiple_documents(self, sample_pod_yaml, sample_deployment_yaml):
+        """Test parsing a stream of '---' separated manifests"""
+        stream = f"---\n{sample_pod_yaml}\n---\n{sample_deployment_yaml}\n---\n"
+        manifests = parse_k8s_yaml_all(stream)
+        assert [m["kind"] for m in manifests] == ["Pod", "Deployment"]
+        assert parse_k8s_yaml_all(stream.encode("utf-8")) == manifests
+
+        # A single manifest, with or without a marker, is one document
+        assert len(parse_k8s_yaml_all(sample_pod_yaml)) == 1
+        assert len(parse_k8s_yaml_all("---\n" + sample_pod_yaml)) == 1
+
+        with pytest.raises(K8sParserError, match="Document 1"):
+            parse_k8s_yaml_all(f"{sample_pod_yaml}\n---\nfoo: bar\n")
+        with pytest.raises(K8sParserError, match="must be a mapping"):
+            parse_k8s_yaml_all("---\n---\n")
+
+    def test_parse_json_manifest(self):
+        """Test parsing a manifest written as JSON or as a YAML flow mapping"""
+        json_content = '{"apiVersion": "v1", "kind": "Pod", "metadata": {"name": "p"}}'
+        assert parse_k8s_yaml(json_content)["kind"] == "Pod"
+        assert parse_k8s_yaml(json_content.encode("utf-8"))["kind"] == "Pod"
+
+        flow_content = "{apiVersion: v1, kind: Pod, metadata: {name: p}}"
+        assert parse_k8s_yaml(flow_content)["metadata"]["name"] == "p"
+
+    def test_parse_restricted_tags(self):
+        """Test that timestamps stay strings and non-JSON tags are rejected"""
         yaml_content = """
-        apiVersion: apps/v1
-        kind: Deployment
+        apiVersion: v1
+        kind: Pod
         metadata:
-          name: nginx-deployment
-          labels:
-            app: nginx
-        spec:
-          replicas: 3
-          selector:
-            matchLabels:
-              app: nginx
-          template:
-            metadata:
-              labels:
-                app: nginx
-            spec:
-              containers:
-              - name: nginx
-                image: nginx:1.14.2
-                ports:
-                - containerPort: 80
-                env:
-                - name: NGINX_HOST
-                  value: example.com
-                - name: NGINX_PORT
-                  value: "80"
-                resources:
-                  limits:
-                    cpu: 500m
-                    memory: 512Mi
-                  requests:
-                    cpu: 200m
-                    memory: 256Mi
+          name: test-pod
+          creationTimestamp: 2024-01-01T00:00:00Z
         """
         result = parse_k8s_yaml(yaml_content)
+        assert result["metadata"]["creationTimestamp"] == "2024-01-01T00:00:00Z"
+
+        with pytest.raises(K8sParserError, match="binary"):
+            parse_k8s_yaml(
+                "apiVersion: v1\nkind: Secret\nmetadata: {}\ndata: !!binary aGk=\n"
+            )
+
+    @pytest.mark.skipif(
+        not yaml.__with_libyaml__, reason="PyYAML built without libyaml"
+    )
+    def test_loader_uses_libyaml(self):
+        """Test that the loader is backed by libyaml when it is available"""
+        assert issubclass(K8sLoader, yaml.CSafeLoader)
+
+    def test_jsonschema_imported_on_demand(self):
+        """Test that jsonschema is only imported once a manifest fails the check"""
+        script = (
+            "import sys\n"
+            "from k8s_converter.core.converter import parse_k8s_yaml\n"
+            "parse_k8s_yaml('apiVersion: v1\\nkind: Pod\\nmetadata: {}\\n')\n"
+            "assert 'jsonschema' not in sys.modules\n"
+        )
+        subprocess.run([sys.executable, "-c", script], check=True)
+
+    def test_mapping_keys_interned(self, sample_deployment_yaml):
+        """Test that repeated mapping keys share one str object"""
+        result = parse_k8s_yaml(sample_deployment_yaml)
+        container = result["spec"]["template"]["spec"]["containers"][0]
+        name_key = next(key for key in container if key == "name")
+        assert name_key is next(key for key in result["metadata"] if key == "name")
+
+        # Keys that aren't strings are kept as they are
+        result = parse_k8s_yaml("apiVersion: v1\nkind: Pod\nmetadata: {}\n1: one")
+        assert result[1] == "one"
+
+    def test_numeric_scalar_resolution(self):
+        """Test that the fast numeric path resolves scalars like PyYAML does"""
+        values = [
+            "0",
+            "7",
+            "42",
+            "012",
+            "08",
+            "-12",
+            "+3",
+            "-0",
+            "1.5",
+            "1.",
+            "-0.25",
+            "+1.0",
+            "1.2.3",
+            "0x1F",
+            "0b101",
+            "1_000",
+            "1:30",
+            "1e3",
+            "1.0e+3",
+            ".5",
+            "-",
+            "+",
+            "-.inf",
+            "1.21-alpine",
+            "3000m",
+            "10Gi",
+            "v1",
+        ]
+        reference = yaml.SafeLoader("")
+        loader = K8sLoader("")
+        for value in values:
+            expected = reference.resolve(yaml.ScalarNode, value, (True, False))
+            assert loader.resolve(yaml.ScalarNode, value, (True, False)) == expected
+        # Quoted scalars always stay strings
+        assert loader.resolve(yaml.ScalarNode, "42", (False, True)) == (
+            "tag:yaml.org,2002:str"
+        )
+
+    def test_parse_cache(self, sample_pod_yaml):
+        """Test that cached parses return independent copies"""
+        configure_parse_cache(8)
+        try:
+            first = parse_k8s_yaml(sample_pod_yaml)
+            first["spec"]["containers"].append({"name": "sidecar"})
+
+            # The same content as bytes hits the cache entry stored for the str
+            second = parse_k8s_yaml(sample_pod_yaml.encode("utf-8"))
+            assert second is not first
+            assert len(second["spec"]["containers"]) == 1
+
+            # Streamed uploads share the same entries
+            stream = io.BytesIO(sample_pod_yaml.encode("utf-8"))
+            third = parse_k8s_yaml_stream(stream)
+            assert third is not second
+            assert len(third["spec"]["containers"]) == 1
+
+            # Invalid content is not cached
+            for _ in range(2):
+                with pytest.raises(K8sParserError):
+                    parse_k8s_yaml("foo: bar")
+        finally:
+            configure_parse_cache(0)
+
+    def test_parse_cache_invalid_size(self, monkeypatch):
+        """Test that invalid parse cache sizes are rejected or ignored"""
+        with pytest.raises(ValueError):
+            configure_parse_cache(-1)
+
+        # An invalid environment setting leaves the cache disabled
+        for value in ("abc", "-1"):
+            monkeypatch.setenv("K8S_CONVERTER_PARSE_CACHE", value)
+            assert converter._parse_cache_size_from_env() == 0
+        monkeypatch.setenv("K8S_CONVERTER_PARSE_CACHE", "16")
+        assert converter._parse_cache_size_from_env() == 16
+
+    def test_complex_kubernetes_resource(self, sample_deployment_yaml):
+        """Test parsing a complex Kubernetes resource with nested structures"""
+        result = parse_k8s_yaml(sample_deployment_yaml)
         assert result["kind"] == "Deployment"
         assert result["spec"]["replicas"] == 3
         assert len(result["spec"]["template"]["spec"]["containers"]) == 1
@@ -134,25 +330,11 @@ class TestConverter:
         assert "single" in result["data"]["special.what"]
         assert "double" in result["data"]["special.what"]
 
-    @pytest.fixture
-    def sample_yaml_content(self):
-        """Sample YAML content for testing"""
-        return """
-        apiVersion: v1
-        kind: Pod
-        metadata:
-          name: test-pod
-        spec:
-          containers:
-          - name: nginx
-            image: nginx:latest
-        """
-
-    def test_yaml_file_to_json(self, sample_yaml_content, tmp_path):
+    def test_yaml_file_to_json(self, sample_pod_yaml, tmp_path):
         """Test converting a YAML file to JSON"""
         # Create a temporary YAML file
         file_path = tmp_path / "test.yaml"
-        file_path.write_text(sample_yaml_content)
+        file_path.write_text(sample_pod_yaml)
 
         # Convert the file to JSON
         result = yaml_file_to_json(file_path)
@@ -161,6 +343,31 @@ class TestConverter:
         assert result["kind"] == "Pod"
         assert result["metadata"]["name"] == "test-pod"
 
+    def test_yaml_file_to_json_large_file(self, tmp_path):
+        """Test converting a YAML file large enough to be memory-mapped"""
+        file_path = tmp_path / "large.yaml"
+        lines = "\n".join(f"  key{i}: value{i}" for i in range(10000))
+        file_path.write_text(
+            f"apiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: big\ndata:\n{lines}\n"
+        )
+        assert file_path.stat().st_size >= MMAP_THRESHOLD
+
+        result = yaml_file_to_json(file_path)
+
+        assert result["kind"] == "ConfigMap"
+        assert len(result["data"]) == 10000
+
+        # The mapped file also goes through the JSON fast path and the precheck
+        json_path = tmp_path / "large.json"
+        json_path.write_text(json.dumps(result))
+        assert json_path.stat().st_size >= MMAP_THRESHOLD
+        assert yaml_file_to_json(json_path) == result
+
+        blank_path = tmp_path / "blank.yaml"
+        blank_path.write_text(" \n" * MMAP_THRESHOLD)
+        with pytest.raises(K8sParserError, match="must be a mapping"):
+            yaml_file_to_json(blank_path)
+
     def test_save_json_to_file(self, tmp_path):
         """Test saving JSON to a file"""
         # Sample JSON data
@@ -178,11 +385,25 @@ class TestConverter:
             data = json.load(f)
             assert data["kind"] == "Pod"
 
-    def test_process_file(self, sample_yaml_content, tmp_path):
+    @pytest.mark.parametrize("pretty", [True, False])
+    def test_serialize_json_special_numbers(self, pretty):
+        """Test serializing integers beyond 64 bits and NaN"""
+        manifest = parse_k8s_yaml(
+            "apiVersion: v1\nkind: Pod\nmetadata: {}\n"
+            "n: 123456789012345678901234567890"
+        )
+        assert json.loads(serialize_json(manifest, pretty))["n"] == (
+            123456789012345678901234567890
+        )
+
+        manifest = parse_k8s_yaml("apiVersion: v1\nkind: Pod\nmetadata: {}\nn: .nan")
+        assert json.loads(serialize_json(manifest, pretty))["n"] is None
+
+    def test_process_file(self, sample_pod_yaml, tmp_path):
         """Test processing a single file"""
         # Create a temporary YAML file
         input_file = tmp_path / "test.yaml"
-        input_file.write_text(sample_yaml_content)
+        input_file.write_text(sample_pod_yaml)
 
         # Create a temporary output directory
         output_dir = tmp_path / "output"
@@ -198,7 +419,7 @@ class TestConverter:
         output_file = output_dir / "test.json"
         assert output_file.exists()
 
-    def test_process_directory(self, sample_yaml_content, tmp_path):
+    def test_process_directory(self, sample_pod_yaml, tmp_path):
         """Test processing a directory of YAML files"""
         # Create a temporary directory with YAML files
         input_dir = tmp_path / "input"
@@ -207,7 +428,7 @@ class TestConverter:
         # Create a few YAML files
         for i in range(2):
             file_path = input_dir / f"test{i}.yaml"
-            file_path.write_text(sample_yaml_content)
+            file_path.write_text(sample_pod_yaml)
 
         # Create a temporary output directory
         output_dir = tmp_path / "output"
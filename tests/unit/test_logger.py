@@ -1,6 +1,14 @@
 import logging
 import io
-from k8s_converter.core.logger import logger
+from logging.handlers import QueueHandler
+
+from k8s_converter.core import logger as logger_module
+from k8s_converter.core.logger import (
+    logger,
+    setup_queue_logging,
+    skip_unused_record_fields,
+    stop_queue_logging,
+)
 
 
 class TestLogger:
@@ -47,3 +55,41 @@ class TestLogger:
             # Clean up - restore original level and remove our handler
             logger.setLevel(original_level)
             logger.removeHandler(handler)
+
+    def test_record_skips_unused_fields(self, monkeypatch):
+        """Test that records don't collect fields the log format doesn't show"""
+        for name in ("logThreads", "logProcesses", "logMultiprocessing"):
+            monkeypatch.setattr(logging, name, True)
+        skip_unused_record_fields()
+
+        record = logger.makeRecord(
+            logger.name, logging.INFO, "", 0, "Test message", (), None
+        )
+        assert record.thread is None
+        assert record.process is None
+        assert record.processName is None
+
+    def test_setup_queue_logging(self, monkeypatch):
+        """Test that queue logging installs a single root queue handler"""
+        # The record flags are restored by monkeypatch, the handlers below
+        for name in ("logThreads", "logProcesses", "logMultiprocessing"):
+            monkeypatch.setattr(logging, name, getattr(logging, name))
+        root = logging.getLogger()
+        handlers = root.handlers[:]
+        # The API test client may have already set it up
+        was_active = logger_module._listener is not None
+
+        setup_queue_logging()
+        setup_queue_logging()
+        try:
+            queue_handlers = [
+                handler
+                for handler in root.handlers
+                if isinstance(handler, QueueHandler)
+            ]
+            assert len(queue_handlers) == 1
+        finally:
+            if not was_active:
+                stop_queue_logging()
+                stop_queue_logging()
+                assert root.handlers == handlers